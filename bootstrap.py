@@ -0,0 +1,39 @@
+"""
+Shared start-up for the standalone scripts.
+
+Loads the project's .env once per process tree: child processes inherit
+the loaded variables together with a marker, so they skip parsing the
+file again. ``run`` executes a script's main coroutine on uvloop when it
+is available.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (uvicorn[standard] installs it on Unix)
+    uvloop = None
+
+
+ENV_PATH = Path(__file__).parent / ".env"
+_LOADED_MARKER = "_DOTENV_LOADED"
+
+
+def load_env():
+    """Load .env unless this process or a parent process already did."""
+    if os.environ.get(_LOADED_MARKER):
+        return
+    
+    if ENV_PATH.exists():
+        load_dotenv(ENV_PATH)
+    os.environ[_LOADED_MARKER] = "1"
+
+
+def run(main_coroutine):
+    """Run a script's main coroutine, on uvloop's faster event loop if installed."""
+    if uvloop is not None:
+        return uvloop.run(main_coroutine)
+    return asyncio.run(main_coroutine)
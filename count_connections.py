@@ -4,81 +4,306 @@ Quick script to count LinkedIn connections and show the data structure.
 """
 
 import asyncio
-import json
+import hashlib
+import importlib.util
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import httpx
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib parser
+    import json as orjson
+
+try:
+    import ijson
+except ImportError:  # without ijson, count-only pages are parsed with orjson
+    ijson = None
+
 # Load environment variables
 env_path = Path(__file__).parent / ".env"
 if env_path.exists():
     load_dotenv(env_path)
 
 
-async def count_linkedin_connections():
+SNAPSHOT_URL = "https://api.linkedin.com/rest/memberSnapshotData"
+PAGE_SIZE = 200
+
+# Snapshot JSON repeats the same keys per connection and compresses well;
+# only advertise brotli when httpx can actually decode it
+ACCEPT_ENCODING = "gzip, br" if importlib.util.find_spec("brotli") is not None else "gzip"
+
+# Static request headers; the bearer token is merged in once per run
+_BASE_HEADERS = {
+    "LinkedIn-Version": "202312",
+    "Content-Type": "application/json",
+    "Accept-Encoding": ACCEPT_ENCODING
+}
+
+# Raw snapshot pages are cached here with their ETag for conditional re-fetches
+CACHE_DIR = Path.home() / ".cache" / "linkedin_sync"
+
+# Shared client so paginated and sibling requests reuse one (HTTP/2 if h2 is installed) connection
+_CLIENT = httpx.AsyncClient(
+    http2=importlib.util.find_spec("h2") is not None,
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=8, max_connections=16)
+)
+
+
+def _cache_path(headers: dict, domain: str, start: int, count: int) -> Path:
+    """Cache file for one snapshot page, keyed by URL, token, domain and page window."""
+    key = f"{SNAPSHOT_URL}|{headers.get('Authorization', '')}|{domain}|{start}|{count}"
+    return CACHE_DIR / f"{domain.lower()}_{hashlib.sha256(key.encode()).hexdigest()[:16]}.json"
+
+
+def _read_cached_etag(cache_path: Path):
+    """Return the stored ETag for a cached page, if both files exist."""
+    etag_path = cache_path.with_suffix(".etag")
+    if cache_path.exists() and etag_path.exists():
+        return etag_path.read_text()
+    return None
+
+
+def _write_cache(cache_path: Path, etag: str, body: bytes):
+    """Store a page body alongside its ETag."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_bytes(body)
+    cache_path.with_suffix(".etag").write_text(etag)
+
+
+async def _fetch_page(client: httpx.AsyncClient, headers: dict, start: int, count: int,
+                      buffer: bytearray, domain: str = "CONNECTIONS"):
+    """Fetch a single page of a snapshot domain into ``buffer``.
+    
+    The raw body is read into the caller's reusable buffer so it can be
+    handed to orjson/ijson as bytes, skipping httpx's bytes -> str -> dict
+    round trip. Pages are revalidated with If-None-Match and served from
+    the on-disk cache on HTTP 304.
+    """
+    params = {
+        "q": "criteria",
+        "domain": domain,
+        "start": start,
+        "count": count
+    }
+    
+    # Disk access runs in a thread so it doesn't stall the look-ahead request
+    cache_path = _cache_path(headers, domain, start, count)
+    cached_etag = await asyncio.to_thread(_read_cached_etag, cache_path)
+    if cached_etag:
+        headers = {**headers, "If-None-Match": cached_etag}
+    
+    buffer.clear()
+    async with client.stream("GET", SNAPSHOT_URL, headers=headers, params=params) as response:
+        if response.status_code == 304 and cached_etag:
+            buffer += await asyncio.to_thread(cache_path.read_bytes)
+            return
+        
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            buffer += chunk
+        etag = response.headers.get("etag")
+    
+    if etag:
+        await asyncio.to_thread(_write_cache, cache_path, etag, bytes(buffer))
+
+
+def _parse_connections(buffer: bytearray) -> tuple:
+    """Parse a snapshot page into its list of connection dicts and its paging block."""
+    data = orjson.loads(buffer)
+    
+    page_connections = []
+    for element in data.get("elements", []):
+        page_connections.extend(element.get("snapshotData", []))
+    return page_connections, data.get("paging", {})
+
+
+def _count_connections(buffer: bytearray) -> tuple:
+    """Count the connections on a snapshot page without building their dicts.
+    
+    Returns the count and the page's paging block (``total`` and the link rels).
+    """
+    if ijson is None:
+        page_connections, paging = _parse_connections(buffer)
+        return len(page_connections), paging
+    
+    count = 0
+    paging = {}
+    for prefix, event, value in ijson.parse(bytes(buffer)):
+        if event == "start_map" and prefix == "elements.item.snapshotData.item":
+            count += 1
+        elif prefix == "paging.total":
+            paging["total"] = value
+        elif prefix == "paging.links" and event == "start_array":
+            paging["links"] = []
+        elif prefix == "paging.links.item.rel":
+            paging["links"].append({"rel": value})
+    return count, paging
+
+
+def _has_next_page(paging: dict, next_start: int) -> bool:
+    """Whether the snapshot has a batch at index ``next_start``, per the page's paging block.
+    
+    ``total`` is the number of batches; without it, a "next" link decides.
+    Without either, pages are fetched until one comes back empty.
+    """
+    total = paging.get("total")
+    if total is not None:
+        return next_start < total
+    links = paging.get("links")
+    if links is not None:
+        return any(link.get("rel") == "next" for link in links)
+    return True
+
+
+async def iter_connection_pages(client: httpx.AsyncClient, headers: dict, page_size: int = PAGE_SIZE,
+                                materialize_pages: int = None, domain: str = "CONNECTIONS"):
+    """Lazily yield ``(count, connections)`` one page at a time.
+    
+    ``start`` is a batch index (start=1 is the second page, not an offset of
+    ``page_size`` records); paging stops on an empty page or once
+    ``paging.total``/the "next" link says there are no more batches.
+    Only the first ``materialize_pages`` pages (all when None) are parsed
+    into dicts; later pages are just counted and yield an empty list.
+    The next page is requested while the current one is being consumed,
+    keeping at most one look-ahead request in flight.
+    """
+    start = 0
+    # Pages are fetched one after another, so a single body buffer can be reused
+    buffer = bytearray()
+    next_task = asyncio.create_task(_fetch_page(client, headers, start, page_size, buffer, domain))
+    
+    try:
+        while next_task is not None:
+            await next_task
+            next_task = None
+            
+            if materialize_pages is None or start < materialize_pages:
+                page_connections, paging = _parse_connections(buffer)
+                page_count = len(page_connections)
+            else:
+                page_connections = []
+                page_count, paging = _count_connections(buffer)
+            start += 1
+            
+            # Pages can be shorter than page_size before the end, so only an empty
+            # page or the paging block ends the snapshot
+            if page_count and _has_next_page(paging, start):
+                next_task = asyncio.create_task(_fetch_page(client, headers, start, page_size, buffer, domain))
+            
+            yield page_count, page_connections
+    finally:
+        if next_task is not None:
+            next_task.cancel()
+
+
+async def _count_domain(client: httpx.AsyncClient, headers: dict, domain: str,
+                        semaphore: asyncio.Semaphore) -> int:
+    """Count the snapshot entries of one domain without materializing them."""
+    async with semaphore:
+        total = 0
+        async for page_count, _ in iter_connection_pages(client, headers, materialize_pages=0, domain=domain):
+            total += page_count
+        return total
+
+
+async def count_snapshot_domains(domains: list, client: httpx.AsyncClient = _CLIENT) -> dict:
+    """Count several snapshot domains concurrently over the shared client.
+    
+    Returns a mapping of domain to count, or to the exception raised for
+    that domain so one failed (e.g. rate-limited) domain doesn't abort the rest.
+    """
+    access_token = os.getenv("LINKEDIN_ACCESS_TOKEN")
+    if not access_token:
+        print("❌ LINKEDIN_ACCESS_TOKEN not found")
+        return {}
+    
+    headers = {**_BASE_HEADERS, "Authorization": f"Bearer {access_token}"}
+    
+    # Bound fan-out to respect LinkedIn rate limits
+    semaphore = asyncio.Semaphore(4)
+    results = await asyncio.gather(
+        *[_count_domain(client, headers, domain, semaphore) for domain in domains],
+        return_exceptions=True
+    )
+    return dict(zip(domains, results))
+
+
+async def count_linkedin_connections(client: httpx.AsyncClient = _CLIENT):
     """Count LinkedIn connections and analyze the data."""
     access_token = os.getenv("LINKEDIN_ACCESS_TOKEN")
     if not access_token:
         print("❌ LINKEDIN_ACCESS_TOKEN not found")
         return
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "LinkedIn-Version": "202312",
-            "Content-Type": "application/json"
-        }
+    headers = {**_BASE_HEADERS, "Authorization": f"Bearer {access_token}"}
+    
+    try:
+        print("LinkedIn Connections Count")
+        print("=" * 40)
         
-        url = "https://api.linkedin.com/rest/memberSnapshotData"
-        params = {
-            "q": "criteria",
-            "domain": "CONNECTIONS"
-        }
+        total_connections = 0
+        sample = []
         
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            print("LinkedIn Connections Count")
-            print("=" * 40)
-            
-            total_connections = 0
-            
-            if "elements" in data:
-                for element in data["elements"]:
-                    if "snapshotData" in element:
-                        connections = element["snapshotData"]
-                        total_connections += len(connections)
-                        
-                        print(f"📊 Total connections found: {len(connections)}")
-                        print(f"📄 Paging info: {data.get('paging', {})}")
-                        
-                        if connections:
-                            print(f"\n📋 Sample connections:")
-                            for i, conn in enumerate(connections[:3]):  # Show first 3
-                                print(f"  {i+1}. {conn.get('First Name', '')} {conn.get('Last Name', '')}")
-                                print(f"     Company: {conn.get('Company', 'N/A')}")
-                                print(f"     Position: {conn.get('Position', 'N/A')}")
-                                print(f"     Connected: {conn.get('Connected On', 'N/A')}")
-                                print(f"     Email: {conn.get('Email Address', 'Not available')}")
-                                print()
-                        
-                        print(f"🔑 Available fields per connection:")
-                        if connections:
-                            sample_keys = list(connections[0].keys())
-                            for key in sample_keys:
-                                print(f"  - {key}")
-            
-            return total_connections
-                        
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            return 0
+        # Only the first page is needed as dicts for the sample; the rest are just counted
+        async for page_count, page_connections in iter_connection_pages(client, headers, materialize_pages=1):
+            if len(sample) < 3:
+                sample.extend(page_connections[:3 - len(sample)])
+            total_connections += page_count
+        
+        lines = []
+        if sample:
+            lines.append(f"\n📋 Sample connections:")
+            for i, conn in enumerate(sample):
+                lines.append(f"  {i+1}. {conn.get('First Name', '')} {conn.get('Last Name', '')}")
+                lines.append(f"     Company: {conn.get('Company', 'N/A')}")
+                lines.append(f"     Position: {conn.get('Position', 'N/A')}")
+                lines.append(f"     Connected: {conn.get('Connected On', 'N/A')}")
+                lines.append(f"     Email: {conn.get('Email Address', 'Not available')}")
+                lines.append("")
+        
+        lines.append(f"📊 Total connections found: {total_connections}")
+        
+        if sample:
+            lines.append(f"🔑 Available fields per connection:")
+            lines.extend(f"  - {key}" for key in sample[0])
+        
+        print("\n".join(lines))
+        
+        return total_connections
+                    
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return 0
+
+
+async def main():
+    """Run the count and close the shared client.
+    
+    Extra command line arguments are treated as additional snapshot
+    domains (e.g. PROFILE POSITIONS) to count alongside CONNECTIONS.
+    """
+    try:
+        count = await count_linkedin_connections()
+        
+        extra_domains = [domain.upper() for domain in sys.argv[1:]]
+        if extra_domains:
+            domain_counts = await count_snapshot_domains(extra_domains)
+            print("\n📚 Other snapshot domains:")
+            for domain, result in domain_counts.items():
+                if isinstance(result, Exception):
+                    print(f"  - {domain}: ❌ {result}")
+                else:
+                    print(f"  - {domain}: {result}")
+        
+        return count
+    finally:
+        await _CLIENT.aclose()
 
 
 if __name__ == "__main__":
-    count = asyncio.run(count_linkedin_connections())
-    print(f"\n🎯 Final count: {count} LinkedIn connections available via API")
\ No newline at end of file
+    count = asyncio.run(main())
+    print(f"\n🎯 Final count: {count} LinkedIn connections available via API")
@@ -7,23 +7,259 @@ and stores them in a comprehensive JSON file.
 """
 
 import asyncio
+import hashlib
+import importlib.util
 import json
 import logging
 import os
+import re
+import sys
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 import httpx
 from datetime import datetime
 import time
+from collections import Counter, defaultdict
+
+try:
+    import ijson
+except ImportError:  # without ijson, each page is parsed in one go
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is used instead
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # without pyarrow, the analysis walks the contacts row by row
+    pa = None
+
+
+# Only request the contact columns consumed by the analysis, the duplicate pipelines
+# and the AI comparison prompt (description and the CRM's own LinkedIn profile links);
+# DYNAMICS_CONTACT_SELECT overrides the list, e.g. without the custom mc_* columns
+CONTACT_SELECT = ",".join([
+    "contactid", "firstname", "lastname", "fullname",
+    "emailaddress1", "telephone1", "mobilephone", "jobtitle", "companyname",
+    "address1_line1", "address1_city", "address1_country",
+    "createdon", "modifiedon", "statecode",
+    "description", "mc_linkedin", "mc_linkedinprofile"
+])
+
+
+# @odata.nextLink/@odata.deltaLink follow the "value" array, so they are recovered from the end of a streamed page
+NEXT_LINK_PATTERN = re.compile(rb'"@odata\.(nextLink|deltaLink)"\s*:\s*("(?:[^"\\]|\\.)*")')
+NEXT_LINK_TAIL_BYTES = 16384
+
+# Raw pagination pages are cached here so an interrupted download can resume
+PAGE_CACHE_DIR = Path("data/.http_cache")
+PAGE_CACHE_TTL = 86400  # seconds
+
+# OAuth token persisted between runs, kept outside the project tree so it is never committed
+TOKEN_CACHE_PATH = Path.home() / ".cache" / "linkedin_sync" / "crm_token.json"
+
+# Pages shrink (down to MIN_PAGE_SIZE) while the CRM throttles and grow back after a run of successful pages
+THROTTLE_STATUS_CODES = (429, 503)
+MAX_THROTTLE_RETRIES = 5
+MIN_PAGE_SIZE = 500
+PAGE_SIZE_RATCHET_PAGES = 5
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    """Seconds to wait before retrying a throttled request (Retry-After, default 1s)."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "1")))
+    except ValueError:
+        return 1.0
+
+
+def _write_page_cache(cache_path: Path, body: bytes):
+    """Atomically store one complete page; run via asyncio.to_thread."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".part")
+    tmp_path.write_bytes(body)
+    os.replace(tmp_path, cache_path)
+
+
+def _json_parse(data: bytes) -> Any:
+    """Parse a JSON body straight from bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dump(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, compact unless ``indent`` is set."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=str, option=option)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def write_contacts_json(path: Path, output_data: Dict[str, Any]):
+    """Write the export document, streaming the contacts one compact line each.
+    
+    The small session/analysis sections stay pretty-printed; contacts are
+    serialized individually so the whole document is never built as one
+    string, and without indentation the file is considerably smaller. The
+    result is still a single JSON document with the same structure.
+    """
+    with open(path, 'wb') as f:
+        f.write(b"{\n")
+        for key, value in output_data.items():
+            if key == "contacts":
+                continue
+            f.write(_json_dump(key) + b": " + _json_dump(value, indent=True) + b",\n")
+        
+        f.write(b'"contacts": [')
+        for index, contact in enumerate(output_data.get("contacts", [])):
+            f.write(b",\n" if index else b"\n")
+            f.write(_json_dump(contact))
+        f.write(b"\n]\n}\n")
+
+
+def _contact_stats(contacts: List[Dict[str, Any]], key_fields: List[str]) -> Dict[str, Any]:
+    """Collect the contact statistics in a single row-by-row pass."""
+    field_counts = Counter()
+    # Every key field is reported, like in _columnar_contact_stats, even if always empty
+    key_field_counts = Counter(dict.fromkeys(key_fields, 0))
+    countries = Counter()
+    cities = Counter()
+    companies = Counter()
+    titles = Counter()
+    timeline = Counter()
+    
+    for contact in contacts:
+        for field, value in contact.items():
+            # Counts every field seen, including ones that are always empty
+            field_counts[field] += value is not None and bool(str(value).strip())
+        
+        # Bind the lookup once per row instead of resolving contact.get on every field
+        cget = contact.get
+        for field in key_fields:
+            if cget(field):
+                key_field_counts[field] += 1
+        
+        country = cget("address1_country")
+        if country:
+            countries[country] += 1
+        city = cget("address1_city")
+        if city:
+            cities[city] += 1
+        company = cget("companyname")
+        if company:
+            companies[company] += 1
+        title = cget("jobtitle")
+        if title:
+            titles[title] += 1
+        created = cget("createdon")
+        year = created[:4] if isinstance(created, str) else ""  # Extract year from ISO date
+        if year.isdigit():
+            timeline[year] += 1
+    
+    return {
+        "field_counts": field_counts,
+        "key_field_counts": key_field_counts,
+        "top_countries": countries.most_common(10),
+        "top_cities": cities.most_common(10),
+        "top_companies": companies.most_common(20),
+        "top_job_titles": titles.most_common(20),
+        "creation_timeline": sorted(timeline.items())
+    }
+
+
+def _non_empty_strings(column):
+    """Keep the non-null, non-empty values of a string column."""
+    if pa.types.is_null(column.type):
+        return pa.array([], pa.string())
+    if not pa.types.is_string(column.type):
+        raise pa.ArrowTypeError(f"Expected a string column, got {column.type}")
+    return column.filter(pc.greater(pc.utf8_length(column), 0))
+
+
+def _most_common(column, limit: int) -> List[tuple]:
+    """Arrow equivalent of ``Counter.most_common``: ties keep first-seen order."""
+    counts = pc.value_counts(_non_empty_strings(column))
+    top = counts.take(pc.array_sort_indices(counts.field("counts"), order="descending")[:limit])
+    return [(row["values"], row["counts"]) for row in top.to_pylist()]
+
+
+def _columnar_contact_stats(contacts: List[Dict[str, Any]], key_fields: List[str]) -> Dict[str, Any]:
+    """Collect the same statistics as ``_contact_stats`` with pyarrow compute kernels.
+    
+    The contacts are converted to one Arrow column per field (the union of
+    all keys, missing values as nulls), so counts and top values run in C
+    instead of per-row Python code.
+    """
+    struct = pa.array(contacts)
+    columns = dict(zip([field.name for field in struct.type], struct.flatten()))
+    empty = pa.nulls(len(contacts))
+    
+    field_counts = {}
+    for field, column in columns.items():
+        if pa.types.is_null(column.type):
+            field_counts[field] = 0
+        elif pa.types.is_string(column.type):
+            non_blank = pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(column)), 0)
+            field_counts[field] = pc.sum(non_blank).as_py() or 0
+        else:
+            # str() of any other non-null value is never blank
+            field_counts[field] = pc.count(column).as_py()
+    
+    created = _non_empty_strings(columns.get("createdon", empty))
+    years = pc.utf8_slice_codeunits(created, 0, 4)
+    timeline = pc.value_counts(years.filter(pc.utf8_is_digit(years)))
+    
+    return {
+        "field_counts": field_counts,
+        "key_field_counts": {field: len(_non_empty_strings(columns.get(field, empty))) for field in key_fields},
+        "top_countries": _most_common(columns.get("address1_country", empty), 10),
+        "top_cities": _most_common(columns.get("address1_city", empty), 10),
+        "top_companies": _most_common(columns.get("companyname", empty), 20),
+        "top_job_titles": _most_common(columns.get("jobtitle", empty), 20),
+        "creation_timeline": sorted((row["values"], row["counts"]) for row in timeline.to_pylist())
+    }
+
+
+class RateLimiter:
+    """Token bucket that spaces out request starts to respect CRM API throttling."""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a request may be started."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1
+                self._updated_at = time.monotonic()
+            
+            self._tokens -= 1
 
 
 class DynamicsCRMDownloader:
     """Downloads all contacts from Microsoft Dynamics CRM."""
     
-    def __init__(self):
+    def __init__(self, refresh: bool = False):
         self.logger = logging.getLogger(__name__)
         self.output_file = Path("data/dynamics_crm_contacts_all.json")
+        # Ignore (and overwrite) cached pages from earlier runs
+        self.refresh = refresh
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
         
         # CRM Configuration
@@ -31,147 +267,349 @@ class DynamicsCRMDownloader:
         self.client_id = os.getenv("DYNAMICS_CLIENT_ID")
         self.client_secret = os.getenv("DYNAMICS_CLIENT_SECRET")
         self.crm_url = os.getenv("DYNAMICS_CRM_URL")
+        self.contact_select = os.getenv("DYNAMICS_CONTACT_SELECT") or CONTACT_SELECT
         
         self.access_token = None
         self.token_expires_at = None
+        # Token persisted between runs so one-shot invocations skip the OAuth round trip
+        self._token_path = TOKEN_CACHE_PATH
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Unique contacts keyed (and deduplicated) on contactid
+        self._contacts: Dict[str, Dict[str, Any]] = {}
+        self._duplicates_skipped = 0
+        # Rows without a contactid, which cannot be keyed or deduplicated
+        self._invalid_skipped = 0
+        self._contacts_removed = 0
+        # Change-tracking link from the last complete download, see download_all_contacts
+        self._delta_link_path = Path("data/.crm_deltalink.txt")
+        self._delta_link: Optional[str] = None
+        # Current Prefer: odata.maxpagesize, adapted to throttling during download_all_contacts
+        self._page_size = 5000
+        # ~2 requests/second sustained with short bursts
+        self._rate_limiter = RateLimiter(rate=2.0, capacity=4)
+    
+    def _headers(self, access_token: str, page_size: Optional[int] = None,
+                 track_changes: bool = False) -> Dict[str, str]:
+        """Build Web API request headers without per-entity OData annotations."""
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json;odata.metadata=none",
+            "OData-Version": "4.0"
+        }
+        preferences = []
+        if track_changes:
+            preferences.append("odata.track-changes")
+        if page_size:
+            preferences.append(f"odata.maxpagesize={page_size}")
+        if preferences:
+            headers["Prefer"] = ",".join(preferences)
+        return headers
+    
+    async def __aenter__(self):
+        """Open one long-lived HTTP client shared by all requests."""
+        self._client = httpx.AsyncClient(
+            timeout=60.0,
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=120)
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the shared HTTP client."""
+        await self._client.aclose()
+        self._client = None
+    
+    def _load_cached_token(self) -> bool:
+        """Load a still-valid token for this tenant/client/CRM from disk."""
+        try:
+            with open(self._token_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        if (cached.get("tenant_id"), cached.get("client_id"), cached.get("crm_url")) != (self.tenant_id, self.client_id, self.crm_url):
+            return False
+        if not cached.get("access_token") or cached.get("expires_at", 0) <= time.time():
+            return False
+        
+        self.access_token = cached["access_token"]
+        self.token_expires_at = cached["expires_at"]
+        return True
+    
+    def _save_cached_token(self):
+        """Atomically persist the current token, readable only by the owner."""
+        tmp_path = self._token_path.with_suffix(".tmp")
+        try:
+            self._token_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "tenant_id": self.tenant_id,
+                    "client_id": self.client_id,
+                    "crm_url": self.crm_url,
+                    "access_token": self.access_token,
+                    "expires_at": self.token_expires_at
+                }, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._token_path)
+        except OSError as e:
+            self.logger.warning("Could not cache access token: %s", e)
     
     async def get_access_token(self) -> str:
         """Get OAuth access token for Dynamics CRM."""
         if self.access_token and self.token_expires_at and time.time() < self.token_expires_at:
             return self.access_token
         
+        if self._load_cached_token():
+            self.logger.info("Using cached OAuth access token")
+            return self.access_token
+        
         self.logger.info("Getting new OAuth access token...")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            token_url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-            
-            data = {
-                "grant_type": "client_credentials",
-                "client_id": self.client_id,
-                "client_secret": self.client_secret,
-                "scope": f"{self.crm_url}/.default"
-            }
-            
-            try:
-                response = await client.post(token_url, data=data)
-                response.raise_for_status()
-                
-                token_data = response.json()
-                self.access_token = token_data["access_token"]
-                expires_in = token_data.get("expires_in", 3600)
-                self.token_expires_at = time.time() + expires_in - 60  # 1 minute buffer
-                
-                self.logger.info("✅ OAuth token obtained successfully")
-                return self.access_token
-                
-            except Exception as e:
-                self.logger.error(f"Failed to get access token: {str(e)}")
-                raise
-    
-    async def get_contacts_batch(self, skip: int = 0, top: int = 1000) -> Dict[str, Any]:
-        """Get a batch of contacts from CRM."""
-        access_token = await self.get_access_token()
+        token_url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
         
-        # Try without $select first to see what fields are available
-        select_param = None
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": f"{self.crm_url}/.default"
+        }
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-                "OData-MaxVersion": "4.0",
-                "OData-Version": "4.0"
-            }
-            
-            # Start with a simple query first
-            url = f"{self.crm_url}/api/data/v9.2/contacts"
-            params = {}
+        try:
+            response = await self._client.post(token_url, data=data, timeout=30.0)
+            response.raise_for_status()
             
-            # Use the requested batch size (CRM can handle larger requests)
+            token_data = _json_parse(response.content)
+            self.access_token = token_data["access_token"]
+            expires_in = token_data.get("expires_in", 3600)
+            self.token_expires_at = time.time() + expires_in - 60  # 1 minute buffer
+            self._save_cached_token()
             
-            params["$top"] = top
+            self.logger.info("✅ OAuth token obtained successfully")
+            return self.access_token
+        
+        except Exception as e:
+            self.logger.error("Failed to get access token: %s", e)
+            raise
+    
+    async def _iter_page_bytes(self, url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None):
+        """Yield the raw body of one Web API page, served from the page cache when possible.
+        
+        Pages fetched from the network are yielded as they stream in and
+        written to ``data/.http_cache`` once complete (off the event loop),
+        so an interrupted download resumes from disk for every page it
+        already finished.
+        """
+        request_url = httpx.URL(url, params=params) if params else httpx.URL(url)
+        cache_key = hashlib.sha256(f"{request_url}|{headers.get('Prefer', '')}".encode()).hexdigest()
+        cache_path = PAGE_CACHE_DIR / f"{cache_key}.json"
+        
+        if not self.refresh and cache_path.exists() and time.time() - cache_path.stat().st_mtime < PAGE_CACHE_TTL:
+            self.logger.debug("Serving page from cache: %.100s", request_url)
+            yield await asyncio.to_thread(cache_path.read_bytes)
+            return
+        
+        async with self._client.stream("GET", url, headers=headers, params=params) as response:
+            # Log response details for debugging
+            self.logger.debug("Response status: %d", response.status_code)
+            if response.status_code != 200 and self.logger.isEnabledFor(logging.ERROR):
+                await response.aread()
+                self.logger.error("Response text: %s", response.text)
             
-            # Skip parameter is not supported, so ignore it
+            response.raise_for_status()
             
-            try:
-                self.logger.info(f"Fetching contacts batch: skip={skip}, top={top}")
-                response = await client.get(url, headers=headers, params=params)
-                
-                # Log response details for debugging
-                self.logger.info(f"Response status: {response.status_code}")
-                if response.status_code != 200:
-                    self.logger.error(f"Response text: {response.text}")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                return data
-                
-            except Exception as e:
-                self.logger.error(f"Failed to get contacts batch: {str(e)}")
-                raise
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                yield chunk
+        
+        await asyncio.to_thread(_write_page_cache, cache_path, bytes(body))
     
-    async def get_contacts_from_url(self, url: str) -> Dict[str, Any]:
-        """Get contacts from a specific URL (for pagination)."""
+    def _clear_page_cache(self):
+        """Drop cached pages (and partial writes) once pagination has completed, so the next run starts fresh."""
+        for pattern in ("*.json", "*.part"):
+            for cached_page in PAGE_CACHE_DIR.glob(pattern):
+                cached_page.unlink(missing_ok=True)
+    
+    async def _stream_contacts(self, url: str, headers: Dict[str, str], page_info: Dict[str, Any],
+                               params: Optional[Dict[str, Any]] = None):
+        """Yield the contacts of one Web API page as they are parsed off the wire.
+        
+        With ijson installed, the "value" array is parsed incrementally so
+        only one contact is materialized at a time; the page's
+        @odata.nextLink and @odata.deltaLink (which follow the array) are
+        read from the tail of the body and stored in ``page_info["next_link"]``
+        and ``page_info["delta_link"]``.
+        """
+        if ijson is None:
+            body = b"".join([chunk async for chunk in self._iter_page_bytes(url, headers, params)])
+            data = _json_parse(body)
+            page_info["next_link"] = data.get("@odata.nextLink")
+            page_info["delta_link"] = data.get("@odata.deltaLink")
+            for contact in data.get("value", []):
+                yield contact
+            return
+        
+        contacts = ijson.sendable_list()
+        parser = ijson.items_coro(contacts, "value.item", use_float=True)
+        tail = b""
+        
+        async for chunk in self._iter_page_bytes(url, headers, params):
+            parser.send(chunk)
+            tail = (tail + chunk)[-NEXT_LINK_TAIL_BYTES:]
+            for contact in contacts:
+                yield contact
+            del contacts[:]
+        
+        parser.close()
+        for contact in contacts:
+            yield contact
+        
+        links = {name: _json_parse(value) for name, value in NEXT_LINK_PATTERN.findall(tail)}
+        page_info["next_link"] = links.get(b"nextLink")
+        page_info["delta_link"] = links.get(b"deltaLink")
+    
+    async def get_contacts_batch(self, page_info: Dict[str, Any], page_size: int = 1000):
+        """Stream the first batch of contacts from CRM.
+        
+        The batch's @odata.nextLink is stored in ``page_info["next_link"]``.
+        Change tracking is requested so the last page returns an @odata.deltaLink.
+        """
         access_token = await self.get_access_token()
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-                "OData-MaxVersion": "4.0",
-                "OData-Version": "4.0"
-            }
-            
-            try:
-                self.logger.info(f"Fetching from URL: {url[:100]}...")
-                response = await client.get(url, headers=headers)
-                
-                # Log response details for debugging
-                self.logger.info(f"Response status: {response.status_code}")
-                if response.status_code != 200:
-                    self.logger.error(f"Response text: {response.text}")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                return data
-                
-            except Exception as e:
-                self.logger.error(f"Failed to get contacts from URL: {str(e)}")
-                raise
+        headers = self._headers(access_token, page_size=page_size, track_changes=True)
+        
+        # The page size is requested via Prefer: odata.maxpagesize (a $top
+        # would cap the whole result and suppress @odata.nextLink). Later
+        # pages follow @odata.nextLink, which carries the $select projection along
+        url = f"{self.crm_url}/api/data/v9.2/contacts"
+        params = {
+            "$select": self.contact_select
+        }
+        
+        try:
+            self.logger.debug("Fetching first contacts batch: page_size=%d", page_size)
+            async for contact in self._stream_contacts(url, headers, page_info, params=params):
+                yield contact
+        
+        except Exception as e:
+            self.logger.error("Failed to get contacts batch: %s", e)
+            raise
+    
+    async def get_contacts_from_url(self, url: str, page_info: Dict[str, Any], page_size: int = 1000):
+        """Stream contacts from a specific URL (for pagination or a saved delta link).
+        
+        The page's @odata.nextLink is stored in ``page_info["next_link"]``.
+        """
+        access_token = await self.get_access_token()
+        
+        headers = self._headers(access_token, page_size=page_size, track_changes=True)
+        
+        try:
+            self.logger.debug("Fetching from URL: %.100s...", url)
+            async for contact in self._stream_contacts(url, headers, page_info):
+                yield contact
+        
+        except Exception as e:
+            self.logger.error("Failed to get contacts from URL: %s", e)
+            raise
     
     async def get_total_contact_count(self) -> int:
         """Get the total number of contacts in CRM."""
         access_token = await self.get_access_token()
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-                "OData-MaxVersion": "4.0",
-                "OData-Version": "4.0"
-            }
-            
-            # Get count only
-            url = f"{self.crm_url}/api/data/v9.2/contacts/$count"
+        headers = self._headers(access_token)
+        
+        # Get count only
+        url = f"{self.crm_url}/api/data/v9.2/contacts/$count"
+        
+        try:
+            response = await self._client.get(url, headers=headers, timeout=30.0)
+            response.raise_for_status()
             
-            try:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                
-                # Remove BOM and whitespace, then convert to int
-                count_text = response.text.strip().lstrip('\ufeff')
-                count = int(count_text)
-                self.logger.info(f"Total contacts in CRM: {count}")
-                return count
-                
-            except Exception as e:
-                self.logger.error(f"Failed to get contact count: {str(e)}")
-                return 0
+            # Remove BOM and whitespace, then convert to int
+            count_text = response.text.strip().lstrip('\ufeff')
+            count = int(count_text)
+            self.logger.info("Total contacts in CRM: %d", count)
+            return count
+        
+        except Exception as e:
+            self.logger.error("Failed to get contact count: %s", e)
+            return 0
     
-    async def download_all_contacts(self, batch_size: int = 1000) -> List[Dict[str, Any]]:
-        """Download all contacts from CRM using multiple strategies."""
+    def _add_contact(self, contact: Dict[str, Any]) -> bool:
+        """Keep a contact unless its contactid was already collected."""
+        contact_id = contact.get('contactid')
+        if not contact_id:
+            self._invalid_skipped += 1
+            return False
+        if contact_id in self._contacts:
+            self._duplicates_skipped += 1
+            return False
+        
+        self._contacts[contact_id] = contact
+        return True
+    
+    def _apply_change(self, change: Dict[str, Any]) -> bool:
+        """Apply one row of a delta response to the previously exported contacts.
+        
+        Deleted contacts arrive as ``{"id": ..., "reason": "deleted"}``
+        entries; every other row is a new or modified contact.
+        """
+        if "contactid" not in change and change.get("reason") == "deleted":
+            self._contacts.pop(change.get("id"), None)
+            self._contacts_removed += 1
+            return False
+        
+        contact_id = change.get('contactid')
+        if not contact_id:
+            self._invalid_skipped += 1
+            return False
+        
+        self._contacts[contact_id] = change
+        return True
+    
+    def _load_delta_link(self) -> Optional[str]:
+        """Return the delta link saved by the last complete download, if any."""
+        try:
+            delta_link = self._delta_link_path.read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+        return delta_link or None
+    
+    def _save_delta_link(self, delta_link: str):
+        """Atomically persist the delta link for the next run."""
+        tmp_path = self._delta_link_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(delta_link, encoding='utf-8')
+            os.replace(tmp_path, self._delta_link_path)
+        except OSError as e:
+            self.logger.warning("Could not save delta link: %s", e)
+    
+    def _load_previous_contacts(self) -> Optional[List[Dict[str, Any]]]:
+        """Load the contacts of the last export, which a delta run is applied to."""
+        try:
+            return _json_parse(self.output_file.read_bytes()).get("contacts")
+        except (OSError, ValueError, AttributeError):
+            return None
+    
+    async def download_all_contacts(self, batch_size: int = 5000) -> List[Dict[str, Any]]:
+        """Download all contacts from CRM, or only the changes since the last run.
+        
+        The first request asks for change tracking, so the final page
+        carries an @odata.deltaLink which is saved to
+        ``data/.crm_deltalink.txt`` once every page was read (a full download
+        removes the old link when it starts). When that link and the previous export
+        exist (and ``--refresh`` wasn't given), the download starts from the
+        delta link and merges the new, modified and deleted contacts into
+        the previous export instead of re-reading the whole table.
+        
+        Pages are requested with up to ``batch_size`` contacts; on HTTP
+        429/503 the page size is halved and the page retried after the
+        server's Retry-After, then doubled again after a run of successes.
+        """
         self.logger.info("Starting comprehensive CRM contact download...")
         
         # Get total count first
@@ -181,269 +619,115 @@ class DynamicsCRMDownloader:
             self.logger.warning("No contacts found in CRM")
             return []
         
-        all_contacts = []
+        self._contacts = {}
+        self._duplicates_skipped = 0
+        self._invalid_skipped = 0
+        self._contacts_removed = 0
         batch_number = 1
         
-        # Strategy 1: Try OData pagination first
-        next_url = None
+        next_url = None if self.refresh else await asyncio.to_thread(self._load_delta_link)
+        if next_url:
+            previous_contacts = await asyncio.to_thread(self._load_previous_contacts)
+            if previous_contacts is None:
+                self.logger.info("Saved delta link found but no previous export, downloading all contacts")
+                next_url = None
+            else:
+                for contact in previous_contacts:
+                    self._add_contact(contact)
+                self.logger.info("Applying changes since the last run to %d previously exported contacts", len(self._contacts))
+        
+        delta_mode = next_url is not None
+        self._delta_link = None
+        if not delta_mode:
+            # The saved link belongs to the export this full download replaces; if the
+            # download stops part-way, it must not be applied to the partial export
+            await asyncio.to_thread(self._delta_link_path.unlink, missing_ok=True)
+        add_contact = self._apply_change if delta_mode else self._add_contact
+        delta_link = None
+        pagination_complete = False
+        self._page_size = batch_size
+        throttled_attempts = 0
+        successful_pages = 0
         
         while True:
             try:
-                self.logger.info(f"Downloading batch {batch_number} (retrieved {len(all_contacts)}/{total_count} contacts so far)...")
+                self.logger.debug("Downloading batch %d (retrieved %d/%d contacts so far)...", batch_number, len(self._contacts), total_count)
+                
+                # Respect API throttling between pages
+                await self._rate_limiter.acquire()
                 
+                page_info = {}
                 if next_url:
-                    # Use the next link for subsequent requests
-                    batch_data = await self.get_contacts_from_url(next_url)
+                    # Use the next (or saved delta) link for subsequent requests
+                    batch = self.get_contacts_from_url(next_url, page_info, page_size=self._page_size)
                 else:
                     # First request
-                    batch_data = await self.get_contacts_batch(skip=0, top=batch_size)
+                    batch = self.get_contacts_batch(page_info, page_size=self._page_size)
                 
-                contacts = batch_data.get("value", [])
+                # Contacts are added as they are parsed, one at a time
+                batch_count = 0
+                async for contact in batch:
+                    add_contact(contact)
+                    batch_count += 1
                 
-                if not contacts:
-                    self.logger.info("No more contacts found via OData pagination")
-                    break
+                # Only the final page carries the delta link, possibly with no rows at all
+                delta_link = page_info.get("delta_link") or delta_link
                 
-                all_contacts.extend(contacts)
+                throttled_attempts = 0
+                successful_pages += 1
+                if successful_pages >= PAGE_SIZE_RATCHET_PAGES and self._page_size < batch_size:
+                    self._page_size = min(batch_size, self._page_size * 2)
+                    successful_pages = 0
+                    self.logger.debug("Increasing page size to %d", self._page_size)
                 
-                self.logger.info(f"✅ Downloaded {len(contacts)} contacts in batch {batch_number}")
-                self.logger.info(f"📊 Progress: {len(all_contacts)}/{total_count} contacts ({len(all_contacts)/total_count*100:.1f}%)")
+                if batch_count:
+                    self.logger.debug("✅ Downloaded %d contacts in batch %d", batch_count, batch_number)
+                    self.logger.info("📊 Progress: %d/%d contacts (%.1f%%)", len(self._contacts), total_count, len(self._contacts) / total_count * 100)
                 
                 # Check for next page
-                next_url = batch_data.get("@odata.nextLink")
+                next_url = page_info.get("next_link")
                 if not next_url:
-                    self.logger.info("No @odata.nextLink found")
+                    self.logger.info("No @odata.nextLink found, pagination complete")
+                    self._clear_page_cache()
+                    pagination_complete = True
                     break
                 
                 batch_number += 1
-                
-                # Small delay to be respectful to the API
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                self.logger.error(f"Error downloading batch {batch_number}: {str(e)}")
-                break
-        
-        # Strategy 2: If we didn't get all contacts, try date-based pagination
-        if len(all_contacts) < total_count:
-            self.logger.info(f"Only got {len(all_contacts)}/{total_count} contacts via OData. Trying date-based pagination...")
-            remaining_contacts = await self.download_contacts_by_date_range(all_contacts)
-            all_contacts.extend(remaining_contacts)
-        
-        # Strategy 3: If still missing contacts, try ID-based pagination
-        if len(all_contacts) < total_count:
-            self.logger.info(f"Still missing contacts ({len(all_contacts)}/{total_count}). Trying ID-based pagination...")
-            remaining_contacts = await self.download_remaining_contacts_by_id(all_contacts)
-            all_contacts.extend(remaining_contacts)
-        
-        # Strategy 4: Try different ordering and larger batches
-        if len(all_contacts) < total_count:
-            self.logger.info(f"Still missing contacts ({len(all_contacts)}/{total_count}). Trying different ordering strategies...")
-            remaining_contacts = await self.download_with_different_ordering(all_contacts)
-            all_contacts.extend(remaining_contacts)
-        
-        # Remove duplicates based on contactid
-        unique_contacts = {}
-        for contact in all_contacts:
-            contact_id = contact.get('contactid')
-            if contact_id and contact_id not in unique_contacts:
-                unique_contacts[contact_id] = contact
-        
-        final_contacts = list(unique_contacts.values())
-        
-        self.logger.info(f"✅ Download complete! Retrieved {len(final_contacts)} unique contacts (removed {len(all_contacts) - len(final_contacts)} duplicates)")
-        return final_contacts
-    
-    async def download_contacts_by_date_range(self, existing_contacts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Download contacts by date ranges to get missing contacts."""
-        existing_ids = {contact.get('contactid') for contact in existing_contacts}
-        new_contacts = []
-        
-        # Get date range of existing contacts
-        existing_dates = []
-        for contact in existing_contacts:
-            created_date = contact.get('createdon')
-            if created_date:
-                existing_dates.append(created_date)
-        
-        if not existing_dates:
-            self.logger.info("No creation dates found in existing contacts, skipping date-based pagination")
-            return []
-        
-        # Sort dates to find gaps
-        existing_dates.sort()
-        latest_date = existing_dates[-1]
-        
-        self.logger.info(f"Latest contact date in existing data: {latest_date}")
-        
-        # Try to get contacts created after the latest date we have
-        try:
-            batch_data = await self.get_contacts_with_filter(f"createdon gt {latest_date}")
-            contacts = batch_data.get("value", [])
-            
-            for contact in contacts:
-                contact_id = contact.get('contactid')
-                if contact_id and contact_id not in existing_ids:
-                    new_contacts.append(contact)
-                    existing_ids.add(contact_id)
-            
-            self.logger.info(f"Found {len(new_contacts)} additional contacts via date filtering")
-            
-        except Exception as e:
-            self.logger.error(f"Error in date-based pagination: {str(e)}")
-        
-        return new_contacts
-    
-    async def download_remaining_contacts_by_id(self, existing_contacts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Try to get remaining contacts by using ID-based filtering."""
-        existing_ids = {contact.get('contactid') for contact in existing_contacts}
-        new_contacts = []
-        
-        # Try different filters to get remaining contacts
-        filters = [
-            "statecode eq 0",  # Active contacts only
-            "statecode eq 1",  # Inactive contacts
-            "createdon gt 2020-01-01T00:00:00Z",  # Contacts created after 2020
-            "createdon lt 2020-01-01T00:00:00Z"   # Contacts created before 2020
-        ]
-        
-        for filter_condition in filters:
-            try:
-                self.logger.info(f"Trying filter: {filter_condition}")
-                batch_data = await self.get_contacts_with_filter(filter_condition)
-                contacts = batch_data.get("value", [])
-                
-                added_count = 0
-                for contact in contacts:
-                    contact_id = contact.get('contactid')
-                    if contact_id and contact_id not in existing_ids:
-                        new_contacts.append(contact)
-                        existing_ids.add(contact_id)
-                        added_count += 1
-                
-                self.logger.info(f"Filter '{filter_condition}' added {added_count} new contacts")
-                
-                # Small delay between requests
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                self.logger.error(f"Error with filter '{filter_condition}': {str(e)}")
-                continue
-        
-        self.logger.info(f"ID-based pagination found {len(new_contacts)} additional contacts")
-        return new_contacts
-    
-    async def get_contacts_with_filter(self, filter_condition: str, top: int = 1000) -> Dict[str, Any]:
-        """Get contacts with a specific OData filter."""
-        access_token = await self.get_access_token()
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-                "OData-MaxVersion": "4.0",
-                "OData-Version": "4.0"
-            }
-            
-            url = f"{self.crm_url}/api/data/v9.2/contacts"
-            params = {
-                "$filter": filter_condition,
-                "$top": top
-            }
             
-            try:
-                self.logger.info(f"Fetching contacts with filter: {filter_condition}")
-                response = await client.get(url, headers=headers, params=params)
-                
-                self.logger.info(f"Response status: {response.status_code}")
-                if response.status_code != 200:
-                    self.logger.error(f"Response text: {response.text}")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                return data
-                
-            except Exception as e:
-                self.logger.error(f"Failed to get contacts with filter: {str(e)}")
-                raise
-    
-    async def download_with_different_ordering(self, existing_contacts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Try different ordering strategies to get remaining contacts."""
-        existing_ids = {contact.get('contactid') for contact in existing_contacts}
-        new_contacts = []
-        
-        # Try different ordering strategies
-        ordering_strategies = [
-            "createdon asc",
-            "modifiedon desc", 
-            "modifiedon asc",
-            "fullname asc",
-            "fullname desc",
-            "contactid asc",
-            "contactid desc"
-        ]
-        
-        for order_by in ordering_strategies:
-            try:
-                self.logger.info(f"Trying ordering: {order_by}")
-                batch_data = await self.get_contacts_with_ordering(order_by)
-                contacts = batch_data.get("value", [])
-                
-                added_count = 0
-                for contact in contacts:
-                    contact_id = contact.get('contactid')
-                    if contact_id and contact_id not in existing_ids:
-                        new_contacts.append(contact)
-                        existing_ids.add(contact_id)
-                        added_count += 1
-                
-                self.logger.info(f"Ordering '{order_by}' added {added_count} new contacts")
-                
-                # Small delay between requests
-                await asyncio.sleep(0.5)
-                
             except Exception as e:
-                self.logger.error(f"Error with ordering '{order_by}': {str(e)}")
-                continue
+                if (isinstance(e, httpx.HTTPStatusError) and e.response.status_code in THROTTLE_STATUS_CODES
+                        and throttled_attempts < MAX_THROTTLE_RETRIES):
+                    throttled_attempts += 1
+                    successful_pages = 0
+                    retry_after = _retry_after_seconds(e.response)
+                    self._page_size = max(MIN_PAGE_SIZE, self._page_size // 2)
+                    self.logger.warning("Throttled by CRM (HTTP %d), retrying batch %d in %.1fs with page size %d",
+                                        e.response.status_code, batch_number, retry_after, self._page_size)
+                    await asyncio.sleep(retry_after)
+                    continue
+                
+                if delta_mode and batch_number == 1:
+                    # Delta links expire; start over with a full download
+                    self.logger.warning("Saved delta link was rejected (%s), downloading all contacts", e)
+                    self._delta_link_path.unlink(missing_ok=True)
+                    return await self.download_all_contacts(batch_size)
+                
+                self.logger.error("Error downloading batch %d: %s", batch_number, e)
+                break
         
-        self.logger.info(f"Different ordering strategies found {len(new_contacts)} additional contacts")
-        return new_contacts
-    
-    async def get_contacts_with_ordering(self, order_by: str, top: int = 1000) -> Dict[str, Any]:
-        """Get contacts with specific ordering."""
-        access_token = await self.get_access_token()
+        # Saved together with the export, which the next delta run is applied to; an
+        # incomplete download gets none, so the next run reads the missing pages again
+        self._delta_link = delta_link if pagination_complete else None
+        if not delta_link and pagination_complete:
+            self.logger.info("No @odata.deltaLink returned (change tracking disabled for contacts?), next run downloads all contacts again")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-                "OData-MaxVersion": "4.0",
-                "OData-Version": "4.0"
-            }
-            
-            url = f"{self.crm_url}/api/data/v9.2/contacts"
-            params = {
-                "$orderby": order_by,
-                "$top": top
-            }
-            
-            try:
-                self.logger.info(f"Fetching contacts with ordering: {order_by}")
-                response = await client.get(url, headers=headers, params=params)
-                
-                self.logger.info(f"Response status: {response.status_code}")
-                if response.status_code != 200:
-                    self.logger.error(f"Response text: {response.text}")
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                return data
-                
-            except Exception as e:
-                self.logger.error(f"Failed to get contacts with ordering: {str(e)}")
-                raise
+        if delta_mode:
+            self.logger.info("✅ Delta download complete! %d contacts after removing %d deleted ones", len(self._contacts), self._contacts_removed)
+        else:
+            self.logger.info("✅ Download complete! Retrieved %d unique contacts (removed %d duplicates)", len(self._contacts), self._duplicates_skipped)
+        if self._invalid_skipped:
+            self.logger.warning("Skipped %d rows without a contactid", self._invalid_skipped)
+        return list(self._contacts.values())
     
     async def analyze_contact_data(self, contacts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze the downloaded contact data for insights."""
@@ -461,80 +745,53 @@ class DynamicsCRMDownloader:
             "top_job_titles": {}
         }
         
-        # Analyze field completeness
-        all_fields = set()
-        for contact in contacts:
-            all_fields.update(contact.keys())
+        key_fields = ["fullname", "emailaddress1", "telephone1", "jobtitle", "companyname"]
+        
+        stats = None
+        if pa is not None:
+            try:
+                stats = _columnar_contact_stats(contacts, key_fields)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                # Mixed-type columns can't be converted; analyze row by row instead
+                self.logger.debug("Columnar analysis not possible (%s), falling back to row-wise analysis", e)
+        if stats is None:
+            stats = _contact_stats(contacts, key_fields)
+        
+        # Sample values only need the first few rows
+        sample_values = defaultdict(list)
+        for contact in contacts[:5]:
+            for field, value in contact.items():
+                if value is not None and len(sample_values[field]) < 3:
+                    sample_values[field].append(str(value))
         
-        for field in all_fields:
-            non_null_count = sum(1 for contact in contacts if contact.get(field) is not None and str(contact.get(field)).strip())
+        # Analyze field completeness
+        for field, non_null_count in stats["field_counts"].items():
             analysis["field_analysis"][field] = {
                 "total_records": len(contacts),
                 "non_null_count": non_null_count,
                 "completeness_percentage": (non_null_count / len(contacts)) * 100,
-                "sample_values": [
-                    str(contact.get(field)) for contact in contacts[:5] 
-                    if contact.get(field) is not None
-                ][:3]
+                "sample_values": sample_values.get(field, [])
             }
         
         # Key field completeness
-        key_fields = ["fullname", "emailaddress1", "telephone1", "jobtitle", "companyname"]
         for field in key_fields:
-            count = sum(1 for contact in contacts if contact.get(field))
+            count = stats["key_field_counts"][field]
             analysis["data_completeness"][field] = {
                 "count": count,
                 "percentage": (count / len(contacts)) * 100
             }
         
         # Geographic distribution
-        countries = {}
-        cities = {}
-        for contact in contacts:
-            country = contact.get("address1_country")
-            city = contact.get("address1_city")
-            
-            if country:
-                countries[country] = countries.get(country, 0) + 1
-            if city:
-                cities[city] = cities.get(city, 0) + 1
-        
         analysis["geographic_distribution"] = {
-            "top_countries": sorted(countries.items(), key=lambda x: x[1], reverse=True)[:10],
-            "top_cities": sorted(cities.items(), key=lambda x: x[1], reverse=True)[:10]
+            "top_countries": stats["top_countries"],
+            "top_cities": stats["top_cities"]
         }
         
-        # Top companies
-        companies = {}
-        for contact in contacts:
-            company = contact.get("companyname")
-            if company:
-                companies[company] = companies.get(company, 0) + 1
-        
-        analysis["top_companies"] = sorted(companies.items(), key=lambda x: x[1], reverse=True)[:20]
-        
-        # Top job titles
-        titles = {}
-        for contact in contacts:
-            title = contact.get("jobtitle")
-            if title:
-                titles[title] = titles.get(title, 0) + 1
-        
-        analysis["top_job_titles"] = sorted(titles.items(), key=lambda x: x[1], reverse=True)[:20]
+        analysis["top_companies"] = stats["top_companies"]
+        analysis["top_job_titles"] = stats["top_job_titles"]
         
         # Creation timeline (by year)
-        timeline = {}
-        for contact in contacts:
-            created = contact.get("createdon")
-            if created:
-                try:
-                    year = created[:4]  # Extract year from ISO date
-                    timeline[year] = timeline.get(year, 0) + 1
-                except:
-                    pass
-        
-        analysis["creation_timeline"] = sorted(timeline.items())
-        
+        analysis["creation_timeline"] = stats["creation_timeline"]
         return analysis
     
     async def save_contacts_to_json(self, contacts: List[Dict[str, Any]], analysis: Dict[str, Any]):
@@ -548,21 +805,24 @@ class DynamicsCRMDownloader:
                     "crm_url": self.crm_url,
                     "download_method": "Comprehensive API Export",
                     "api_version": "v9.2",
-                    "fields_retrieved": len(set().union(*(contact.keys() for contact in contacts))) if contacts else 0
+                    # analyze_contact_data already saw every field
+                    "fields_retrieved": len(analysis.get("field_analysis", {}))
                 },
                 "data_analysis": analysis,
                 "contacts": contacts
             }
             
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False, default=str)
+            # Serialize off the event loop so the write doesn't stall other async work
+            await asyncio.to_thread(write_contacts_json, self.output_file, output_data)
+            if self._delta_link:
+                await asyncio.to_thread(self._save_delta_link, self._delta_link)
             
             file_size = self.output_file.stat().st_size
             self.logger.info(f"✅ Saved {len(contacts)} contacts to {self.output_file}")
             self.logger.info(f"📁 File size: {file_size / 1024 / 1024:.1f} MB")
             
             return True
-            
+        
         except Exception as e:
             self.logger.error(f"Error saving contacts to JSON: {str(e)}")
             return False
@@ -581,6 +841,8 @@ async def main():
     )
     
     logger = logging.getLogger(__name__)
+    # httpx logs every request at INFO; keep only its warnings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
     
     # Load environment variables
     env_path = Path(__file__).parent / ".env"
@@ -601,91 +863,90 @@ async def main():
     print("✅ All CRM credentials found")
     print(f"🔗 CRM URL: {os.getenv('DYNAMICS_CRM_URL')}")
     
-    # Initialize downloader
-    downloader = DynamicsCRMDownloader()
-    
-    try:
-        # Test connection first
-        print("\n🔌 Testing CRM connection...")
-        total_count = await downloader.get_total_contact_count()
-        
-        if total_count == 0:
-            print("❌ No contacts found or connection failed")
-            return False
-        
-        print(f"✅ CRM connection successful")
-        print(f"📊 Total contacts to download: {total_count:,}")
-        
-        # Ask for confirmation
+    # Initialize downloader (shares one HTTP client for the whole run)
+    async with DynamicsCRMDownloader(refresh="--refresh" in sys.argv[1:]) as downloader:
         try:
-            user_input = input(f"\n🤔 Download all {total_count:,} contacts? This may take several minutes. (y/n): ").strip().lower()
+            # Test connection first
+            print("\n🔌 Testing CRM connection...")
+            total_count = await downloader.get_total_contact_count()
             
-            if user_input != 'y':
-                print("❌ Download cancelled by user")
+            if total_count == 0:
+                print("❌ No contacts found or connection failed")
                 return False
-        except EOFError:
-            # Auto-approve when running non-interactively
-            print(f"\n🚀 Auto-approving download of {total_count:,} contacts (non-interactive mode)")
-            pass
-        
-        # Start download
-        print(f"\n🚀 Starting complete contact download...")
-        print(f"⏱️ Estimated time: {total_count / 1000 * 2:.1f} minutes")
-        
-        start_time = time.time()
-        contacts = await downloader.download_all_contacts(batch_size=1000)
-        download_time = time.time() - start_time
-        
-        if not contacts:
-            print("❌ No contacts were downloaded")
-            return False
-        
-        print(f"\n✅ Download completed in {download_time:.1f} seconds")
-        print(f"📊 Downloaded {len(contacts):,} contacts")
-        
-        # Analyze data
-        print(f"\n📈 Analyzing contact data...")
-        analysis = await downloader.analyze_contact_data(contacts)
-        
-        # Save to JSON
-        print(f"\n💾 Saving contacts and analysis to JSON...")
-        success = await downloader.save_contacts_to_json(contacts, analysis)
-        
-        if success:
-            print(f"✅ Successfully saved all CRM contacts!")
-            print(f"📁 File: {downloader.output_file}")
-            print(f"📏 Size: {downloader.output_file.stat().st_size / 1024 / 1024:.1f} MB")
             
-            # Show analysis summary
-            print(f"\n📊 Data Analysis Summary:")
-            print(f"   Total contacts: {analysis.get('total_contacts', 0):,}")
+            print(f"✅ CRM connection successful")
+            print(f"📊 Total contacts to download: {total_count:,}")
             
-            completeness = analysis.get('data_completeness', {})
-            print(f"   Data completeness:")
-            for field, data in completeness.items():
-                print(f"     {field}: {data['count']:,} ({data['percentage']:.1f}%)")
+            # Ask for confirmation
+            try:
+                user_input = input(f"\n🤔 Download all {total_count:,} contacts? This may take several minutes. (y/n): ").strip().lower()
+                
+                if user_input != 'y':
+                    print("❌ Download cancelled by user")
+                    return False
+            except EOFError:
+                # Auto-approve when running non-interactively
+                print(f"\n🚀 Auto-approving download of {total_count:,} contacts (non-interactive mode)")
+                pass
             
-            top_companies = analysis.get('top_companies', [])[:5]
-            if top_companies:
-                print(f"   Top companies:")
-                for company, count in top_companies:
-                    print(f"     {company}: {count} contacts")
+            # Start download
+            print(f"\n🚀 Starting complete contact download...")
+            print(f"⏱️ Estimated time: {total_count / 1000 * 2:.1f} minutes")
             
-            top_countries = analysis.get('geographic_distribution', {}).get('top_countries', [])[:5]
-            if top_countries:
-                print(f"   Top countries:")
-                for country, count in top_countries:
-                    print(f"     {country}: {count} contacts")
+            start_time = time.time()
+            contacts = await downloader.download_all_contacts(batch_size=5000)
+            download_time = time.time() - start_time
             
-            return True
-        else:
-            print("❌ Failed to save contacts")
-            return False
+            if not contacts:
+                print("❌ No contacts were downloaded")
+                return False
             
-    except Exception as e:
-        logger.error(f"Error in download process: {str(e)}")
-        print(f"❌ Download failed: {str(e)}")
-        return False
+            print(f"\n✅ Download completed in {download_time:.1f} seconds")
+            print(f"📊 Downloaded {len(contacts):,} contacts")
+            
+            # Analyze data
+            print(f"\n📈 Analyzing contact data...")
+            analysis = await downloader.analyze_contact_data(contacts)
+            
+            # Save to JSON
+            print(f"\n💾 Saving contacts and analysis to JSON...")
+            success = await downloader.save_contacts_to_json(contacts, analysis)
+            
+            if success:
+                print(f"✅ Successfully saved all CRM contacts!")
+                print(f"📁 File: {downloader.output_file}")
+                print(f"📏 Size: {downloader.output_file.stat().st_size / 1024 / 1024:.1f} MB")
+                
+                # Show analysis summary
+                print(f"\n📊 Data Analysis Summary:")
+                print(f"   Total contacts: {analysis.get('total_contacts', 0):,}")
+                
+                completeness = analysis.get('data_completeness', {})
+                print(f"   Data completeness:")
+                for field, data in completeness.items():
+                    print(f"     {field}: {data['count']:,} ({data['percentage']:.1f}%)")
+                
+                top_companies = analysis.get('top_companies', [])[:5]
+                if top_companies:
+                    print(f"   Top companies:")
+                    for company, count in top_companies:
+                        print(f"     {company}: {count} contacts")
+                
+                top_countries = analysis.get('geographic_distribution', {}).get('top_countries', [])[:5]
+                if top_countries:
+                    print(f"   Top countries:")
+                    for country, count in top_countries:
+                        print(f"     {country}: {count} contacts")
+                
+                return True
+            else:
+                print("❌ Failed to save contacts")
+                return False
+        
+        except Exception as e:
+            logger.error(f"Error in download process: {str(e)}")
+            print(f"❌ Download failed: {str(e)}")
+            return False
 
 
 if __name__ == "__main__":
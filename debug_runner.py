@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Debug runner to test PydanticAI with Ollama using a set of probe prompts.
+
+Usage: python debug_runner.py [probe names...] [--cache]
+
+Set DEBUG_VERBOSE=1 to print full tracebacks for failed probes.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import os
+import shelve
+import sys
+import traceback
+from functools import lru_cache
+from pathlib import Path
+import httpx
+
+from bootstrap import load_env, run
+
+# Load environment variables
+load_env()
+
+from pydantic import BaseModel
+from pydantic_ai import Agent
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
+
+
+class TestResult(BaseModel):
+    message: str
+    confidence: float
+
+
+OLLAMA_BASE_URL = 'http://localhost:11434/v1'
+
+# Pass --cache to answer repeated prompts from disk instead of asking Ollama again
+USE_RESPONSE_CACHE = "--cache" in sys.argv[1:]
+RESPONSE_CACHE_PATH = Path(__file__).parent / "data" / ".debug_ai_cache"
+
+# (name, prompt, result type, system prompt); result types given as a dotted
+# path are imported when the probe runs, so a broken module only fails that probe
+PROBES = [
+    ("basic", 'Respond with a message "Hello from AI" and confidence 0.9', TestResult, None),
+    ("system_prompt", 'Give me a test message with confidence 0.75', TestResult,
+     "You are a helpful assistant that responds with structured data."),
+    ("raw", 'Return a JSON object with "message" set to "test" and "confidence" set to 0.5', TestResult, None),
+    ("duplicate_format", '''
+Please return a comparison result with these fields:
+- is_duplicate: false
+- confidence: "none"
+- similarity_score: 0.0
+- reasoning: "Test response"
+- matching_fields: []
+- conflicting_fields: ["different people"]
+''', "sync.ai_duplicate_detection.ComparisonResult", None)
+]
+
+
+class CachedResult:
+    """Agent run result rebuilt from the response cache."""
+    
+    def __init__(self, output: BaseModel):
+        self.output = output
+    
+    @property
+    def data(self) -> BaseModel:
+        return self.output
+    
+    def __repr__(self):
+        return f"CachedResult(output={self.output!r})"
+
+
+class CachedAgent:
+    """Exact-match on-disk response cache in front of ``Agent.run``."""
+    
+    def __init__(self, agent: Agent, result_type: type, model_name: str, system_prompt: str = None):
+        self.agent = agent
+        self.result_type = result_type
+        self.model_name = model_name
+        self.system_prompt = system_prompt
+    
+    def _cache_key(self, prompt: str) -> str:
+        key = f"{self.model_name}|{self.result_type.__name__}|{self.system_prompt or ''}|{prompt}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+    
+    async def run(self, prompt: str):
+        """Return the cached output for this prompt, or run the agent and cache its output."""
+        key = self._cache_key(prompt)
+        RESPONSE_CACHE_PATH.parent.mkdir(exist_ok=True)
+        
+        with shelve.open(str(RESPONSE_CACHE_PATH)) as cache:
+            cached_output = cache.get(key)
+        if cached_output is not None:
+            print("   (cached response)")
+            return CachedResult(self.result_type.model_validate_json(cached_output))
+        
+        result = await self.agent.run(prompt)
+        with shelve.open(str(RESPONSE_CACHE_PATH)) as cache:
+            cache[key] = result.output.model_dump_json()
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_agent(provider: OpenAIProvider, result_type: type, system_prompt: str = None):
+    """Build the Ollama model and agent once per provider, result type and system prompt."""
+    model_name = 'mistral-small:24b'
+    ollama_model = OpenAIModel(model_name=model_name, provider=provider)
+    
+    if system_prompt is None:
+        agent = Agent(model=ollama_model, result_type=result_type)
+    else:
+        agent = Agent(model=ollama_model, result_type=result_type, system_prompt=system_prompt)
+    
+    if USE_RESPONSE_CACHE:
+        return CachedAgent(agent, result_type, model_name, system_prompt)
+    return agent
+
+
+def _resolve_result_type(result_type):
+    """Import a result type given as a dotted path."""
+    if isinstance(result_type, str):
+        module_name, _, name = result_type.rpartition(".")
+        return getattr(importlib.import_module(module_name), name)
+    return result_type
+
+
+async def run_probe(provider: OpenAIProvider, name: str, prompt: str, result_type, system_prompt: str = None) -> bool:
+    """Run one probe prompt and print what the model returned."""
+    try:
+        agent = get_agent(provider, _resolve_result_type(result_type), system_prompt)
+        result = await agent.run(prompt)
+        
+        lines = [f"\n🔍 {name}: ✅ Success!", f"   Result: {result}"]
+        lines.extend(f"   {field}: {value}" for field, value in result.output)
+        print("\n".join(lines))
+        
+        return True
+    
+    except Exception as e:
+        print(f"\n🔍 {name}: ❌ Error: {str(e)}")
+        if os.environ.get("DEBUG_VERBOSE"):
+            traceback.print_exc()
+        return False
+
+
+async def main(probe_names: list = None, title: str = "🚀 PydanticAI + Ollama Debug Tests"):
+    """Run the selected probes (all by default) concurrently."""
+    print(title)
+    print("=" * 50)
+    
+    probes = [probe for probe in PROBES if not probe_names or probe[0] in probe_names]
+    
+    # One provider and connection pool shared by every probe
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=8)
+    )
+    provider = OpenAIProvider(base_url=OLLAMA_BASE_URL, http_client=http_client)
+    
+    try:
+        # The probes are independent Ollama round trips, so run them concurrently
+        # (set OLLAMA_NUM_PARALLEL on the Ollama server so they aren't queued)
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [task_group.create_task(run_probe(provider, *probe)) for probe in probes]
+    finally:
+        await http_client.aclose()
+    
+    results = [task.result() for task in tasks]
+    
+    # Summary
+    print(f"\n" + "=" * 50)
+    print("📊 Debug Results:")
+    for probe, success in zip(probes, results):
+        print(f"   {probe[0]}: {'✅' if success else '❌'}")
+    
+    if all(results):
+        print("\n🎉 PydanticAI + Ollama integration is working!")
+    else:
+        print("\n❌ There's an issue with the PydanticAI + Ollama setup.")
+    
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = run(main([arg for arg in sys.argv[1:] if not arg.startswith("--")]))
+    sys.exit(0 if success else 1)
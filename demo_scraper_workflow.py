@@ -4,14 +4,106 @@ Demo of the LinkedIn profile scraper workflow - showing the concept.
 This creates mock scraped data to demonstrate the complete pipeline.
 """
 
+import importlib.util
 import json
 import os
+import re
+import sys
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
-import asyncio
 import httpx
 
+from bootstrap import load_env, run
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is used instead
+    orjson = None
+
+try:
+    from tqdm import tqdm
+except ImportError:  # without tqdm, only the summary after the loop is printed
+    tqdm = None
+
+
+# Industry keywords, checked in order against the lowercased position + company
+INDUSTRY_PATTERNS = [
+    ("tech", re.compile(r"engineer|developer|tech|software|ai|data")),
+    ("sales", re.compile(r"sales|account|business development")),
+    ("marketing", re.compile(r"marketing|brand|digital"))
+]
+
+
+# Shared LinkedIn client, created on first use and closed by main()
+_CLIENT = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the pooled (HTTP/2 if h2 is installed) LinkedIn client."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+        )
+    return _CLIENT
+
+
+def compile_template(template: str):
+    """Turn a {position}/{company} template into a ``render(position, company)`` function.
+    
+    Templates without placeholders are returned as-is instead of being formatted every time.
+    """
+    if "{" not in template:
+        return lambda position, company: template
+    return lambda position, company: template.format(position=position, company=company)
+
+
+# Enhancement templates for different industries, built once at import
+ENHANCEMENTS = {
+    "tech": {
+        "skills": ("Python", "JavaScript", "React", "AWS", "Docker", "Kubernetes", "AI/ML", "Data Science"),
+        "about_template": "Experienced {position} with expertise in modern web technologies and cloud platforms. Passionate about building scalable solutions and leading high-performing teams.",
+        "experience_template": (
+            "Lead {position} at {company} (2022-Present) - Architecting scalable web applications",
+            "Senior Software Engineer at TechCorp (2020-2022) - Built microservices architecture",
+            "Software Engineer at StartupXYZ (2018-2020) - Full-stack development"
+        )
+    },
+    "sales": {
+        "skills": ("Sales Strategy", "CRM", "Lead Generation", "Negotiations", "Account Management", "Business Development"),
+        "about_template": "Results-driven {position} with proven track record in B2B sales and customer relationship management. Expert in driving revenue growth and building lasting client partnerships.",
+        "experience_template": (
+            "{position} at {company} (2021-Present) - Exceeded sales targets by 25%",
+            "Sales Manager at SalesForce Inc (2019-2021) - Managed key accounts",
+            "Account Executive at BusinessCorp (2017-2019) - Built new client relationships"
+        )
+    },
+    "marketing": {
+        "skills": ("Digital Marketing", "SEO/SEM", "Content Strategy", "Social Media", "Analytics", "Brand Management"),
+        "about_template": "Creative {position} specializing in digital marketing strategies and brand development. Proven ability to drive engagement and convert leads across multiple channels.",
+        "experience_template": (
+            "{position} at {company} (2020-Present) - Developed integrated marketing campaigns",
+            "Marketing Manager at AdAgency (2018-2020) - Increased brand awareness by 40%",
+            "Digital Marketing Specialist at MediaCorp (2016-2018) - Managed social campaigns"
+        )
+    }
+}
+
+# Render functions for the templates above, compiled once instead of per connection
+ABOUT_RENDERERS = {industry: compile_template(enhancement["about_template"])
+                   for industry, enhancement in ENHANCEMENTS.items()}
+EXPERIENCE_RENDERERS = {industry: [compile_template(template) for template in enhancement["experience_template"]]
+                        for industry, enhancement in ENHANCEMENTS.items()}
+
+
+def classify_industry(position: str, company: str) -> str:
+    """Pick the enhancement industry for a connection, defaulting to tech."""
+    haystack = (position + company).lower()
+    return next((industry for industry, pattern in INDUSTRY_PATTERNS if pattern.search(haystack)), "tech")
+
 
 async def create_demo_scraped_data():
     """Create demo scraped LinkedIn profile data."""
@@ -19,9 +111,7 @@ async def create_demo_scraped_data():
     print("=" * 60)
     
     # Load environment
-    env_path = Path(__file__).parent / ".env"
-    if env_path.exists():
-        load_dotenv(env_path)
+    load_env()
     
     # 1. Get real LinkedIn connections for authentic URLs
     print("📱 Step 1: Fetching real LinkedIn connections...")
@@ -31,27 +121,28 @@ async def create_demo_scraped_data():
         print("❌ LINKEDIN_ACCESS_TOKEN not found")
         return False
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "LinkedIn-Version": "202312",
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.linkedin.com/rest/memberSnapshotData"
-        params = {"q": "criteria", "domain": "CONNECTIONS"}
-        
-        response = await client.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        connections = []
-        
-        if "elements" in data:
-            for element in data["elements"]:
-                if "snapshotData" in element:
-                    connections = element["snapshotData"]
-                    break
+    client = get_client()
+    
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "LinkedIn-Version": "202312",
+        "Content-Type": "application/json"
+    }
+    
+    url = "https://api.linkedin.com/rest/memberSnapshotData"
+    params = {"q": "criteria", "domain": "CONNECTIONS"}
+    
+    response = await client.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    
+    data = orjson.loads(response.content) if orjson is not None else response.json()
+    connections = []
+    
+    if "elements" in data:
+        for element in data["elements"]:
+            if "snapshotData" in element:
+                connections = element["snapshotData"]
+                break
     
     if not connections:
         print("❌ No LinkedIn connections found")
@@ -64,82 +155,48 @@ async def create_demo_scraped_data():
     
     enhanced_profiles = []
     
-    # Enhancement templates for different industries
-    enhancements = {
-        "tech": {
-            "skills": ["Python", "JavaScript", "React", "AWS", "Docker", "Kubernetes", "AI/ML", "Data Science"],
-            "about_template": "Experienced {position} with expertise in modern web technologies and cloud platforms. Passionate about building scalable solutions and leading high-performing teams.",
-            "experience_template": [
-                "Lead {position} at {company} (2022-Present) - Architecting scalable web applications",
-                "Senior Software Engineer at TechCorp (2020-2022) - Built microservices architecture",
-                "Software Engineer at StartupXYZ (2018-2020) - Full-stack development"
-            ]
-        },
-        "sales": {
-            "skills": ["Sales Strategy", "CRM", "Lead Generation", "Negotiations", "Account Management", "Business Development"],
-            "about_template": "Results-driven {position} with proven track record in B2B sales and customer relationship management. Expert in driving revenue growth and building lasting client partnerships.",
-            "experience_template": [
-                "{position} at {company} (2021-Present) - Exceeded sales targets by 25%",
-                "Sales Manager at SalesForce Inc (2019-2021) - Managed key accounts",
-                "Account Executive at BusinessCorp (2017-2019) - Built new client relationships"
-            ]
-        },
-        "marketing": {
-            "skills": ["Digital Marketing", "SEO/SEM", "Content Strategy", "Social Media", "Analytics", "Brand Management"],
-            "about_template": "Creative {position} specializing in digital marketing strategies and brand development. Proven ability to drive engagement and convert leads across multiple channels.",
-            "experience_template": [
-                "{position} at {company} (2020-Present) - Developed integrated marketing campaigns",
-                "Marketing Manager at AdAgency (2018-2020) - Increased brand awareness by 40%",
-                "Digital Marketing Specialist at MediaCorp (2016-2018) - Managed social campaigns"
-            ]
-        }
-    }
+    industry_counts = Counter()
+    # All profiles of one demo run share a single scrape timestamp
+    scraped_at = datetime.now().isoformat()
     
-    for i, connection in enumerate(connections):
-        print(f"   Processing {i+1}/{len(connections)}: {connection.get('First Name', '')} {connection.get('Last Name', '')}")
-        
-        # Determine industry based on position/company
-        position = connection.get('Position', '').lower()
-        company = connection.get('Company', '').lower()
+    # A rate-limited progress bar instead of a line per connection
+    progress = tqdm(connections, desc="   Enhancing", unit="profile") if tqdm is not None else connections
+    
+    for i, connection in enumerate(progress):
+        # Look up each connection field once
+        first_name = connection.get('First Name', '')
+        last_name = connection.get('Last Name', '')
+        position = connection.get('Position', 'Professional')
+        company = connection.get('Company', 'Company')
         
-        if any(word in position + company for word in ['engineer', 'developer', 'tech', 'software', 'ai', 'data']):
-            industry = "tech"
-        elif any(word in position + company for word in ['sales', 'account', 'business development']):
-            industry = "sales"
-        elif any(word in position + company for word in ['marketing', 'brand', 'digital']):
-            industry = "marketing"
-        else:
-            industry = "tech"  # Default
+        # Determine industry based on position/company (the placeholder defaults match no keyword)
+        industry = classify_industry(position, company)
+        industry_counts[industry] += 1
         
-        enhancement = enhancements[industry]
+        enhancement = ENHANCEMENTS[industry]
         
         # Create enhanced profile data
-        full_name = f"{connection.get('First Name', '')} {connection.get('Last Name', '')}".strip()
+        full_name = f"{first_name} {last_name}".strip()
+        name_slug = full_name.lower().replace(' ', '.')
+        company_slug = company.lower().replace(' ', '') or "company"
         
         enhanced_profile = {
             "full_name": full_name,
-            "headline": connection.get('Position', 'Professional'),
+            "headline": position,
             "location": "San Francisco Bay Area",  # Mock location
-            "about": enhancement["about_template"].format(
-                position=connection.get('Position', 'Professional'),
-                company=connection.get('Company', 'Tech Company')
-            ),
-            "current_position": f"{connection.get('Position', 'Professional')} at {connection.get('Company', 'Company')}",
-            "experience": [
-                exp.format(
-                    position=connection.get('Position', 'Professional'),
-                    company=connection.get('Company', 'Company')
-                ) for exp in enhancement["experience_template"]
-            ],
+            "about": ABOUT_RENDERERS[industry](position, company),
+            "current_position": f"{position} at {company}",
+            "experience": [render(position, company) for render in EXPERIENCE_RENDERERS[industry]],
             "education": [
                 "Master of Business Administration - Stanford University (2014-2016)",
                 f"Bachelor of Science - University of California (2010-2014)"
             ],
             "skills": enhancement["skills"],
             "connections_count": f"{500 + i * 50}+ connections",
-            "contact_info": [f"{full_name.lower().replace(' ', '.')}@{connection.get('Company', 'company').lower().replace(' ', '')}.com"],
+            # No made-up address for connections without a name
+            "contact_info": [f"{name_slug}@{company_slug}.com"] if name_slug else [],
             "profile_url": connection.get('URL', ''),
-            "scraped_at": datetime.now().isoformat(),
+            "scraped_at": scraped_at,
             "scraping_success": True,
             "original_connection_data": connection
         }
@@ -147,10 +204,22 @@ async def create_demo_scraped_data():
         enhanced_profiles.append(enhanced_profile)
     
     print(f"✅ Created {len(enhanced_profiles)} enhanced profiles")
+    print(f"   Industries: {', '.join(f'{industry} {count}' for industry, count in industry_counts.most_common())}")
     
     # 3. Save to JSON with metadata
     print("\n💾 Step 3: Saving enhanced data to JSON...")
     
+    # Gather all data quality figures in a single pass over the profiles
+    with_skills = with_experience = with_about = total_skills = total_experience = 0
+    for profile in enhanced_profiles:
+        skills = profile["skills"]
+        experience = profile["experience"]
+        with_skills += bool(skills)
+        with_experience += bool(experience)
+        with_about += bool(profile["about"])
+        total_skills += len(skills)
+        total_experience += len(experience)
+    
     output_data = {
         "scraping_session": {
             "timestamp": datetime.now().isoformat(),
@@ -161,11 +230,11 @@ async def create_demo_scraped_data():
             "ai_model": os.getenv('OLLAMA_MODEL', 'mistral-small:24b'),
             "description": "Demo data showing enhanced LinkedIn profiles with simulated AI extraction",
             "data_quality": {
-                "profiles_with_skills": len([p for p in enhanced_profiles if p["skills"]]),
-                "profiles_with_experience": len([p for p in enhanced_profiles if p["experience"]]),
-                "profiles_with_about": len([p for p in enhanced_profiles if p["about"]]),
-                "avg_skills_per_profile": sum(len(p["skills"]) for p in enhanced_profiles) / len(enhanced_profiles),
-                "avg_experience_per_profile": sum(len(p["experience"]) for p in enhanced_profiles) / len(enhanced_profiles)
+                "profiles_with_skills": with_skills,
+                "profiles_with_experience": with_experience,
+                "profiles_with_about": with_about,
+                "avg_skills_per_profile": total_skills / len(enhanced_profiles),
+                "avg_experience_per_profile": total_experience / len(enhanced_profiles)
             }
         },
         "profiles": enhanced_profiles
@@ -174,8 +243,11 @@ async def create_demo_scraped_data():
     output_file = Path("data/linkedin_profiles_detailed.json")
     output_file.parent.mkdir(exist_ok=True)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        # orjson writes UTF-8 directly, like ensure_ascii=False
+        output_file.write_bytes(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
+    else:
+        output_file.write_text(json.dumps(output_data, indent=2, ensure_ascii=False), encoding='utf-8')
     
     print(f"✅ Saved demo data to: {output_file}")
     print(f"   File size: {output_file.stat().st_size / 1024:.1f} KB")
@@ -219,10 +291,14 @@ async def create_demo_scraped_data():
 
 async def main():
     """Run the demo."""
-    success = await create_demo_scraped_data()
-    return success
+    try:
+        success = await create_demo_scraped_data()
+        return success
+    finally:
+        if _CLIENT is not None:
+            await _CLIENT.aclose()
 
 
 if __name__ == "__main__":
-    success = asyncio.run(main())
-    exit(0 if success else 1)
\ No newline at end of file
+    success = run(main())
+    sys.exit(0 if success else 1)
\ No newline at end of file
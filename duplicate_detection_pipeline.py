@@ -4,27 +4,165 @@ Multi-stage duplicate detection pipeline for LinkedIn and CRM contacts.
 
 This pipeline uses a three-stage approach to efficiently detect duplicates:
 1. Fast pre-filtering (blocking) to reduce candidate pairs
-2. ML-based ranking using dedupe library
+2. Candidate ranking: direct fuzzy scoring (rapidfuzz, else difflib), or the
+   dedupe ML model for large candidate sets without rapidfuzz
 3. Selective AI verification for final decisions
 
 Reduces comparisons from 7.4M to manageable numbers while maintaining accuracy.
 """
 
+import asyncio
+import itertools
 import json
 import logging
+import math
+import os
 import time
 from pathlib import Path
-from typing import Dict, List, Any, Tuple, Set
+from typing import Dict, Iterable, List, Any, Tuple, Set
 from dataclasses import dataclass
 from collections import defaultdict
-import re
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from functools import lru_cache
+import string
+import zlib
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from unidecode import unidecode
 
+try:
+    import ijson
+except ImportError:  # without ijson, input files are parsed in one go
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is used instead
+    orjson = None
+
+try:
+    from rapidfuzz import fuzz, process, utils as fuzz_utils
+except ImportError:  # without rapidfuzz, stage 2 uses difflib, or trains the dedupe model for large candidate sets
+    process = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # without pyarrow, blocking keys are normalized one string at a time
+    pa = None
+
+# Blocking normalization: unidecode output is ASCII, so one translate table drops
+# everything but a-z0-9; prefixes/suffixes are checked in order, first match wins
+_DROP_NON_ALNUM = str.maketrans('', '', ''.join(
+    chr(c) for c in range(128) if chr(c) not in string.ascii_lowercase + string.digits))
+_TITLE_PREFIXES = ('dr', 'prof', 'mr', 'mrs', 'ms')
+_COMPANY_SUFFIXES = ('gmbh', 'ag', 'ltd', 'inc', 'corp', 'llc')
+
+# MinHash/LSH blocking over character 3-grams: 64 hash functions split into
+# 16 bands of 4, so contacts with ~50% shared 3-grams land in a common bucket
+_MINHASH_PERMUTATIONS = 64
+_LSH_BANDS = 16
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_A, _MINHASH_B = np.random.default_rng(42).integers(1, 1 << 31, size=(2, _MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+
 # Import existing components
 from duplicate_finder import DuplicateFinder
 from sync.ai_duplicate_detection import AIDuplicateDetector, MatchConfidence
 
 
+@lru_cache(maxsize=262144)
+def normalize_for_blocking(text: str) -> str:
+    """Normalize text for blocking (more aggressive than dedupe normalization).
+    
+    Cached, as the same first names and companies come up again and again.
+    """
+    if not text.strip():
+        return ""
+    
+    # Convert to lowercase, remove accents
+    text = unidecode(text.lower())
+    
+    # Remove all non-alphanumeric characters
+    text = text.translate(_DROP_NON_ALNUM)
+    
+    # Remove common prefixes/suffixes
+    for prefix in _TITLE_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+            break
+    for suffix in _COMPANY_SUFFIXES:
+        if text.endswith(suffix):
+            text = text[:-len(suffix)]
+            break
+    
+    return text
+
+
+def load_json(path: Path) -> Any:
+    """Read a JSON data file (parsed from bytes by orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_json_items(path: Path, key: str) -> List[Any]:
+    """Read the ``key`` array of a JSON data file.
+    
+    With ijson installed the file is parsed incrementally and only the array
+    items are built, not the rest of the document or a copy of the raw text.
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            return list(ijson.items(f, f"{key}.item", use_float=True))
+    return load_json(path).get(key, [])
+
+
+def save_json(path: Path, data: Any):
+    """Write pretty-printed UTF-8 JSON, like ``json.dump(indent=2, ensure_ascii=False)``."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def pairwise_similarity(left: List[str], right: List[str]) -> np.ndarray:
+    """Similarity (0-1) of each ``left[i]``/``right[i]`` string pair.
+    
+    Uses rapidfuzz's ``WRatio`` in one ``cpdist`` call when installed, else
+    difflib's ratio on the lowercased strings.
+    """
+    if process is not None:
+        return process.cpdist(left, right, scorer=fuzz.WRatio, processor=fuzz_utils.default_process, workers=-1) / 100
+    return np.fromiter(
+        (SequenceMatcher(None, a.lower().strip(), b.lower().strip()).ratio() if a.strip() and b.strip() else 0.0
+         for a, b in zip(left, right)),
+        dtype=np.float64, count=len(left)
+    )
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature of the character 3-grams of a normalized text."""
+    trigrams = {text[i:i + 3] for i in range(len(text) - 2)}
+    hashes = np.fromiter((zlib.crc32(trigram.encode()) for trigram in trigrams), dtype=np.uint64, count=len(trigrams))
+    return ((_MINHASH_A * hashes + _MINHASH_B) % _MINHASH_PRIME).min(axis=1)
+
+
+def lsh_band_keys(texts: List[str]) -> List[List[str]]:
+    """LSH bucket keys of each normalized text (none for texts shorter than a 3-gram)."""
+    keys = []
+    for text in texts:
+        if len(text) < 3:
+            keys.append([])
+            continue
+        bands = minhash_signature(text).reshape(_LSH_BANDS, -1)
+        keys.append([f"lsh_{band}_{rows.tobytes().hex()}" for band, rows in enumerate(bands)])
+    return keys
+
+
 @dataclass
 class CandidatePair:
     """Represents a candidate duplicate pair."""
@@ -34,28 +172,93 @@ class CandidatePair:
     similarity_score: float = 0.0
 
 
+@dataclass
+class BlockingFields:
+    """Normalized blocking fields of one contact list, one entry per contact."""
+    source: str
+    contacts: List[Dict[str, Any]]
+    names: List[str]
+    first_names: List[str]
+    last_names: List[str]
+    emails: List[str]
+    domains: List[str]
+    companies: List[str]
+
+
+@dataclass
+class CandidateBatch:
+    """Candidate pairs stored as parallel index arrays into the contact lists.
+    
+    Iterating yields ``CandidatePair`` objects one at a time, so the pairs
+    don't all have to be held as Python objects.
+    """
+    linkedin_contacts: List[Dict[str, Any]]
+    crm_contacts: List[Dict[str, Any]]
+    linkedin_idx: np.ndarray
+    crm_idx: np.ndarray
+    reason_code: np.ndarray
+    reason_vocab: List[str]
+    
+    def __len__(self) -> int:
+        return len(self.linkedin_idx)
+    
+    def __iter__(self):
+        for li, crm, code in zip(self.linkedin_idx.tolist(), self.crm_idx.tolist(), self.reason_code.tolist()):
+            yield CandidatePair(
+                linkedin_contact=self.linkedin_contacts[li],
+                crm_contact=self.crm_contacts[crm],
+                blocking_reason=self.reason_vocab[code]
+            )
+
+
 class BlockingEngine:
     """Fast pre-filtering to create candidate pairs using blocking techniques."""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        
+        # Domain, company and LSH blocks with more records than this are too common
+        # to tell contacts apart and are dropped, however many keys a contact has
+        self.max_block_records = 50
+        # Share of each contact's LSH band keys (rarest first) that is kept; 1.0 keeps every band
+        self.prefix_fraction = 0.3
+        # Exact keys are never pruned: they are the strongest evidence, and their
+        # large blocks are sampled down to max_block_pairs instead
+        self.unpruned_prefixes = ('email_', 'name_')
+        
+        # Blocks yielding more pairs than this only contribute a random sample of them
+        self.max_block_pairs = 10000
+        
+        # MinHash signatures are spread over worker processes from this many texts on
+        self.parallel_min_texts = 20000
     
     def normalize_for_blocking(self, text: str) -> str:
         """Normalize text for blocking (more aggressive than dedupe normalization)."""
-        if not text or not str(text).strip():
+        if not text:
             return ""
+        return normalize_for_blocking(str(text))
+    
+    def normalize_many(self, texts: List[str]) -> List[str]:
+        """Normalize a whole column of texts, same result as ``normalize_for_blocking`` per value.
         
-        # Convert to lowercase, remove accents
-        text = unidecode(str(text).lower())
-        
-        # Remove all non-alphanumeric characters
-        text = re.sub(r'[^a-z0-9]', '', text)
-        
-        # Remove common prefixes/suffixes
-        text = re.sub(r'^(dr|prof|mr|mrs|ms)', '', text)
-        text = re.sub(r'(gmbh|ag|ltd|inc|corp|llc)$', '', text)
-        
-        return text.strip()
+        With pyarrow installed, lowercasing and the regex substitutions run as
+        compute kernels over one string array; only non-ASCII values go through
+        unidecode in Python, as there is no Arrow kernel for transliteration.
+        """
+        if pa is None:
+            # Call the cached function directly, without the method wrapper per value
+            normalize = normalize_for_blocking
+            return [normalize(text if isinstance(text, str) else str(text)) if text else "" for text in texts]
+        
+        column = pa.array([str(text) if text else "" for text in texts], pa.string())
+        non_ascii = pc.invert(pc.string_is_ascii(column))
+        transliterated = [unidecode(text.lower()) for text in column.filter(non_ascii).to_pylist()]
+        column = pc.replace_with_mask(pc.ascii_lower(column), non_ascii, pa.array(transliterated, pa.string()))
+        
+        column = pc.replace_substring_regex(column, r'[^a-z0-9]', '')
+        column = pc.replace_substring_regex(column, f"^({'|'.join(_TITLE_PREFIXES)})", '')
+        column = pc.replace_substring_regex(column, f"({'|'.join(_COMPANY_SUFFIXES)})$", '')
+        return column.to_pylist()
     
     def extract_email_domain(self, email: str) -> str:
         """Extract domain from email address."""
@@ -63,144 +266,240 @@ class BlockingEngine:
             return ""
         return email.split('@')[1].lower().strip()
     
-    def create_name_blocks(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> Dict[str, List]:
+    def preprocess_contacts(self, contacts: List[Dict], source: str) -> BlockingFields:
+        """Read and normalize the blocking fields of one contact list in a single pass."""
+        if source == 'linkedin':
+            full_names = [contact.get('full_name', '') for contact in contacts]
+            parts = [full_name.split() if full_name else [] for full_name in full_names]
+            first_names = [name_parts[0] if len(name_parts) >= 2 else '' for name_parts in parts]
+            last_names = [name_parts[-1] if len(name_parts) >= 2 else '' for name_parts in parts]
+            emails = [contact.get('email', '') for contact in contacts]
+            positions = [contact.get('current_position', '') for contact in contacts]
+            companies = [current_pos.split(' at ')[-1] if current_pos and ' at ' in current_pos else ''
+                         for current_pos in positions]
+        else:
+            # One pass over the CRM contacts, looking each field up once
+            full_names = []
+            first_names = []
+            last_names = []
+            emails = []
+            companies = []
+            for contact in contacts:
+                first_name = contact.get('firstname', '')
+                last_name = contact.get('lastname', '')
+                has_both = bool(first_name and last_name)
+                full_names.append(contact.get('fullname', '') or f"{first_name} {last_name}".strip())
+                first_names.append(first_name if has_both else '')
+                last_names.append(last_name if has_both else '')
+                emails.append(contact.get('emailaddress1', ''))
+                companies.append(contact.get('companyname', '') or contact.get('parentcustomerid', ''))
+        
+        email_keys = []
+        domains = []
+        for email in emails:
+            if email and '@' in email:
+                domain = self.extract_email_domain(email)
+                email_keys.append(email.lower())
+                domains.append(domain if not domain.endswith(('.gmail.com', '.outlook.com', '.yahoo.com', '.hotmail.com')) else '')
+            else:
+                email_keys.append('')
+                domains.append('')
+        
+        return BlockingFields(
+            source=source,
+            contacts=contacts,
+            names=self.normalize_many(full_names),
+            first_names=self.normalize_many(first_names),
+            last_names=self.normalize_many(last_names),
+            emails=email_keys,
+            domains=domains,
+            companies=self.normalize_many(companies)
+        )
+    
+    def create_name_blocks(self, linkedin: BlockingFields, crm: BlockingFields) -> Dict[str, Dict[str, List[int]]]:
         """Create blocking keys based on names."""
-        blocks = defaultdict(list)
+        blocks = defaultdict(lambda: {'linkedin': [], 'crm': []})
         
-        # Process LinkedIn contacts
-        for i, contact in enumerate(linkedin_contacts):
-            full_name = contact.get('full_name', '')
-            if full_name:
-                # Block by normalized full name
-                normalized = self.normalize_for_blocking(full_name)
-                if len(normalized) >= 3:
-                    blocks[f"name_{normalized}"].append(('linkedin', i, contact))
-                
-                # Block by first/last name combination
-                parts = full_name.split()
-                if len(parts) >= 2:
-                    first = self.normalize_for_blocking(parts[0])
-                    last = self.normalize_for_blocking(parts[-1])
-                    if len(first) >= 2 and len(last) >= 2:
-                        blocks[f"name_{first}_{last}"].append(('linkedin', i, contact))
-        
-        # Process CRM contacts
-        for i, contact in enumerate(crm_contacts):
-            full_name = contact.get('fullname', '') or f"{contact.get('firstname', '')} {contact.get('lastname', '')}".strip()
-            if full_name:
+        for fields in (linkedin, crm):
+            for i in range(len(fields.contacts)):
                 # Block by normalized full name
-                normalized = self.normalize_for_blocking(full_name)
+                normalized = fields.names[i]
                 if len(normalized) >= 3:
-                    blocks[f"name_{normalized}"].append(('crm', i, contact))
+                    blocks[f"name_{normalized}"][fields.source].append(i)
                 
                 # Block by first/last name combination
-                first_name = contact.get('firstname', '')
-                last_name = contact.get('lastname', '')
-                if first_name and last_name:
-                    first = self.normalize_for_blocking(first_name)
-                    last = self.normalize_for_blocking(last_name)
-                    if len(first) >= 2 and len(last) >= 2:
-                        blocks[f"name_{first}_{last}"].append(('crm', i, contact))
+                first = fields.first_names[i]
+                last = fields.last_names[i]
+                if len(first) >= 2 and len(last) >= 2:
+                    blocks[f"name_{first}_{last}"][fields.source].append(i)
         
         return blocks
     
-    def create_email_blocks(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> Dict[str, List]:
+    def create_email_blocks(self, linkedin: BlockingFields, crm: BlockingFields) -> Dict[str, Dict[str, List[int]]]:
         """Create blocking keys based on email addresses and domains."""
-        blocks = defaultdict(list)
-        
-        # Process LinkedIn contacts
-        for i, contact in enumerate(linkedin_contacts):
-            email = contact.get('email', '')
-            if email and '@' in email:
-                # Block by exact email
-                blocks[f"email_{email.lower()}"].append(('linkedin', i, contact))
-                
-                # Block by email domain for company matching
-                domain = self.extract_email_domain(email)
-                if domain and not domain.endswith(('.gmail.com', '.outlook.com', '.yahoo.com', '.hotmail.com')):
-                    blocks[f"domain_{domain}"].append(('linkedin', i, contact))
+        blocks = defaultdict(lambda: {'linkedin': [], 'crm': []})
         
-        # Process CRM contacts
-        for i, contact in enumerate(crm_contacts):
-            email = contact.get('emailaddress1', '')
-            if email and '@' in email:
+        for fields in (linkedin, crm):
+            for i in range(len(fields.contacts)):
                 # Block by exact email
-                blocks[f"email_{email.lower()}"].append(('crm', i, contact))
+                if fields.emails[i]:
+                    blocks[f"email_{fields.emails[i]}"][fields.source].append(i)
                 
                 # Block by email domain for company matching
-                domain = self.extract_email_domain(email)
-                if domain and not domain.endswith(('.gmail.com', '.outlook.com', '.yahoo.com', '.hotmail.com')):
-                    blocks[f"domain_{domain}"].append(('crm', i, contact))
+                if fields.domains[i]:
+                    blocks[f"domain_{fields.domains[i]}"][fields.source].append(i)
         
         return blocks
     
-    def create_company_blocks(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> Dict[str, List]:
+    def create_company_blocks(self, linkedin: BlockingFields, crm: BlockingFields) -> Dict[str, Dict[str, List[int]]]:
         """Create blocking keys based on company names."""
-        blocks = defaultdict(list)
-        
-        # Process LinkedIn contacts
-        for i, contact in enumerate(linkedin_contacts):
-            current_pos = contact.get('current_position', '')
-            if current_pos and ' at ' in current_pos:
-                company = current_pos.split(' at ')[-1]
-                normalized = self.normalize_for_blocking(company)
-                if len(normalized) >= 3:
-                    blocks[f"company_{normalized}"].append(('linkedin', i, contact))
+        blocks = defaultdict(lambda: {'linkedin': [], 'crm': []})
         
-        # Process CRM contacts
-        for i, contact in enumerate(crm_contacts):
-            company = contact.get('companyname', '') or contact.get('parentcustomerid', '')
-            if company:
-                normalized = self.normalize_for_blocking(company)
+        for fields in (linkedin, crm):
+            for i in range(len(fields.contacts)):
+                normalized = fields.companies[i]
                 if len(normalized) >= 3:
-                    blocks[f"company_{normalized}"].append(('crm', i, contact))
+                    blocks[f"company_{normalized}"][fields.source].append(i)
+        
+        return blocks
+    
+    def create_ngram_blocks(self, linkedin: BlockingFields, crm: BlockingFields) -> Dict[str, Dict[str, List[int]]]:
+        """Create MinHash/LSH blocking keys over name + company 3-grams.
+        
+        Catches spelling variants the exact keys miss ("Müller-Schmidt" vs
+        "Mueller Schmidt AG"): each band of the signature is one bucket key.
+        """
+        blocks = defaultdict(lambda: {'linkedin': [], 'crm': []})
+        
+        for fields in (linkedin, crm):
+            band_keys = self.compute_band_keys([name + company for name, company in zip(fields.names, fields.companies)])
+            for i in range(len(fields.contacts)):
+                for key in band_keys[i]:
+                    blocks[key][fields.source].append(i)
         
         return blocks
     
-    def generate_candidate_pairs(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> List[CandidatePair]:
+    def compute_band_keys(self, texts: List[str]) -> List[List[str]]:
+        """Compute the LSH keys of each text, in worker processes for large inputs.
+        
+        Only the normalized strings and keys cross the process boundary, never
+        the contact dicts.
+        """
+        workers = os.cpu_count() or 1
+        if workers < 2 or len(texts) < self.parallel_min_texts:
+            return lsh_band_keys(texts)
+        
+        chunk_size = math.ceil(len(texts) / workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return [keys for chunk_keys in executor.map(lsh_band_keys, chunks) for keys in chunk_keys]
+    
+    def prune_blocks(self, block_items: Iterable[Tuple[str, Dict[str, List[int]]]]) -> Dict[str, Dict[str, List[int]]]:
+        """Drop blocking keys that are too common to be evidence of a duplicate.
+        
+        Domain, company and LSH blocks over ``max_block_records`` records are
+        dropped by their global size, so a shared employer or email domain no
+        longer pairs everyone with everyone. Of the remaining LSH bands each
+        contact keeps only its rarest ``prefix_fraction`` (partial inverted
+        index). Exact email and name keys are never pruned. Blocks without both
+        a LinkedIn and a CRM record never yield pairs, so they are dropped too.
+        """
+        blocks = {}
+        oversized_blocks = 0
+        for key, block in block_items:
+            if not block['linkedin'] or not block['crm']:
+                continue
+            if not key.startswith(self.unpruned_prefixes) and len(block['linkedin']) + len(block['crm']) > self.max_block_records:
+                oversized_blocks += 1
+                continue
+            blocks[key] = block
+        
+        if oversized_blocks:
+            self.logger.info(f"Dropped {oversized_blocks} blocks with more than {self.max_block_records} records")
+        if self.prefix_fraction >= 1:
+            return blocks
+        
+        # LSH band keys of each contact
+        record_bands = defaultdict(list)
+        for key, block in blocks.items():
+            if key.startswith('lsh_'):
+                for source, ids in block.items():
+                    for i in ids:
+                        record_bands[(source, i)].append(key)
+        
+        kept = set()
+        block_size = {key: len(block['linkedin']) + len(block['crm']) for key, block in blocks.items()}
+        for record_id, keys in record_bands.items():
+            keys.sort(key=lambda key: (block_size[key], key))
+            kept.update((key, record_id) for key in keys[:math.ceil(self.prefix_fraction * len(keys))])
+        
+        return {key: {source: [i for i in ids if (key, (source, i)) in kept] for source, ids in block.items()}
+                if key.startswith('lsh_') else block
+                for key, block in blocks.items()}
+    
+    def generate_candidate_pairs(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> CandidateBatch:
         """Generate candidate pairs using multiple blocking strategies."""
         self.logger.info("Starting blocking phase...")
         start_time = time.time()
         
-        all_blocks = {}
+        # Normalize every contact once, shared by all blocking strategies
+        linkedin = self.preprocess_contacts(linkedin_contacts, 'linkedin')
+        crm = self.preprocess_contacts(crm_contacts, 'crm')
         
         # Create different types of blocks
-        name_blocks = self.create_name_blocks(linkedin_contacts, crm_contacts)
-        email_blocks = self.create_email_blocks(linkedin_contacts, crm_contacts)
-        company_blocks = self.create_company_blocks(linkedin_contacts, crm_contacts)
-        
-        # Combine all blocks
-        all_blocks.update({f"name_{k}": v for k, v in name_blocks.items()})
-        all_blocks.update({f"email_{k}": v for k, v in email_blocks.items()})
-        all_blocks.update({f"company_{k}": v for k, v in company_blocks.items()})
-        
-        # Generate candidate pairs from blocks
-        candidate_pairs = []
-        seen_pairs = set()
-        
-        for block_key, records in all_blocks.items():
-            if len(records) < 2:
+        name_blocks = self.create_name_blocks(linkedin, crm)
+        email_blocks = self.create_email_blocks(linkedin, crm)
+        company_blocks = self.create_company_blocks(linkedin, crm)
+        ngram_blocks = self.create_ngram_blocks(linkedin, crm)
+        
+        # Index only the rarest keys of each contact; the keys already carry
+        # their strategy prefix, so the blocks are streamed in without merging
+        all_blocks = self.prune_blocks(itertools.chain(
+            name_blocks.items(), email_blocks.items(), company_blocks.items(), ngram_blocks.items()
+        ))
+        
+        # Generate candidate pairs from blocks: every LinkedIn x CRM pair of a
+        # block is encoded as one int64 (linkedin_index * crm_count + crm_index)
+        crm_count = max(len(crm_contacts), 1)
+        block_keys = []
+        block_pair_ids = []
+        
+        for block_key, block in all_blocks.items():
+            # Pruning can leave a block with records from one side only
+            if not block['linkedin'] or not block['crm']:
                 continue
             
-            # Find LinkedIn and CRM records in this block
-            linkedin_records = [r for r in records if r[0] == 'linkedin']
-            crm_records = [r for r in records if r[0] == 'crm']
+            linkedin_ids = np.array(block['linkedin'], dtype=np.int64)
+            crm_ids = np.array(block['crm'], dtype=np.int64)
             
-            # Create pairs between LinkedIn and CRM records
-            for linkedin_record in linkedin_records:
-                for crm_record in crm_records:
-                    # Create unique pair identifier
-                    pair_id = (linkedin_record[1], crm_record[1])
-                    
-                    if pair_id not in seen_pairs:
-                        seen_pairs.add(pair_id)
-                        
-                        candidate_pair = CandidatePair(
-                            linkedin_contact=linkedin_record[2],
-                            crm_contact=crm_record[2],
-                            blocking_reason=block_key
-                        )
-                        candidate_pairs.append(candidate_pair)
+            block_keys.append(block_key)
+            block_size = len(linkedin_ids) * len(crm_ids)
+            if block_size > self.max_block_pairs:
+                # Sample pair positions without replacement, reproducibly per block key
+                rng = np.random.default_rng(zlib.crc32(block_key.encode()))
+                sampled = np.sort(rng.choice(block_size, self.max_block_pairs, replace=False))
+                rows, cols = np.divmod(sampled, len(crm_ids))
+                block_pair_ids.append(linkedin_ids[rows] * crm_count + crm_ids[cols])
+                self.logger.warning(f"Block {block_key} capped at {self.max_block_pairs:,} of {block_size:,} pairs")
+            else:
+                block_pair_ids.append((linkedin_ids[:, None] * crm_count + crm_ids[None, :]).ravel())
+        
+        pair_ids = np.concatenate(block_pair_ids) if block_pair_ids else np.empty(0, dtype=np.int64)
+        pair_blocks = np.repeat(np.arange(len(block_keys), dtype=np.int32), [len(ids) for ids in block_pair_ids])
+        
+        # Keep each pair once, in first-seen order and with the block it was first seen in
+        unique_ids, first_seen = np.unique(pair_ids, return_index=True)
+        order = np.argsort(first_seen, kind='stable')
+        linkedin_idx, crm_idx = np.divmod(unique_ids[order], crm_count)
+        
+        candidate_pairs = CandidateBatch(
+            linkedin_contacts=linkedin_contacts,
+            crm_contacts=crm_contacts,
+            linkedin_idx=linkedin_idx.astype(np.int32),
+            crm_idx=crm_idx.astype(np.int32),
+            reason_code=pair_blocks[first_seen[order]],
+            reason_vocab=block_keys
+        )
         
         elapsed = time.time() - start_time
         reduction_factor = (len(linkedin_contacts) * len(crm_contacts)) / len(candidate_pairs) if candidate_pairs else 1
@@ -227,7 +526,15 @@ class MultiStageDuplicateDetector:
         # Configuration
         self.dedupe_threshold_high = 0.8
         self.dedupe_threshold_medium = 0.5
+        # Directly scored pairs are only reported from the medium threshold on (dedupe
+        # also only returns pairs above its trained threshold), and only if the names
+        # are alike or the emails match: a shared company or domain alone is no match
+        self.fuzzy_min_score = self.dedupe_threshold_medium
+        self.fuzzy_min_name_similarity = 0.7
+        self.dedupe_fast_threshold = 5000  # Fewer candidate pairs are scored without training dedupe
         self.max_ai_comparisons = 10000
+        self.ai_concurrency = 16  # AI requests in flight at once
+        self.ai_batch_size = 8  # Pairs compared per AI request
     
     async def detect_duplicates(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> Dict[str, Any]:
         """
@@ -260,7 +567,8 @@ class MultiStageDuplicateDetector:
                 "high_confidence_matches": [],
                 "medium_confidence_matches": [],
                 "low_confidence_matches": [],
-                "no_matches": []
+                "no_matches": [],
+                "clusters": []
             }
         }
         
@@ -274,7 +582,7 @@ class MultiStageDuplicateDetector:
         results["stage_1_blocking"] = {
             "candidates_generated": len(candidate_pairs),
             "reduction_factor": results["pipeline_stats"]["potential_comparisons"] / len(candidate_pairs) if candidate_pairs else 1,
-            "blocking_strategies": ["name_matching", "email_matching", "company_matching"]
+            "blocking_strategies": ["name_matching", "email_matching", "company_matching", "ngram_lsh_matching"]
         }
         results["pipeline_stats"]["stages_completed"] = 1
         
@@ -282,9 +590,9 @@ class MultiStageDuplicateDetector:
             self.logger.warning("No candidate pairs found in blocking stage")
             return results
         
-        # Stage 2: Dedupe ML Ranking
+        # Stage 2: Candidate Ranking
         self.logger.info("=" * 50)
-        self.logger.info("STAGE 2: ML-based Candidate Ranking (dedupe)")
+        self.logger.info(f"STAGE 2: Candidate Ranking ({self._ranking_scorer(len(candidate_pairs))})")
         self.logger.info("=" * 50)
         
         dedupe_results = await self._run_dedupe_stage(candidate_pairs)
@@ -316,26 +624,107 @@ class MultiStageDuplicateDetector:
         
         return results
     
-    async def _run_dedupe_stage(self, candidate_pairs: List[CandidatePair]) -> Dict[str, Any]:
-        """Run the dedupe ML ranking stage."""
-        # Convert candidate pairs to dedupe format
-        linkedin_contacts = [pair.linkedin_contact for pair in candidate_pairs]
-        crm_contacts = [pair.crm_contact for pair in candidate_pairs]
+    def _score_pairs_directly(self, candidate_pairs: CandidateBatch) -> List[Dict]:
+        """Score the blocked pairs directly instead of with a trained dedupe model.
+        
+        Names and companies are compared with ``pairwise_similarity``, emails
+        must match exactly; the weights follow the fast pipeline's scorer.
+        Pairs under ``fuzzy_min_score``, or whose names are less alike than
+        ``fuzzy_min_name_similarity`` without a matching email, are not
+        reported. Matches use the dedupe result format.
+        """
+        linkedin_contacts = [candidate_pairs.linkedin_contacts[i] for i in candidate_pairs.linkedin_idx.tolist()]
+        crm_contacts = [candidate_pairs.crm_contacts[i] for i in candidate_pairs.crm_idx.tolist()]
+        
+        linkedin_names = [contact.get('full_name', '') or '' for contact in linkedin_contacts]
+        crm_names = [contact.get('fullname', '') or f"{contact.get('firstname', '')} {contact.get('lastname', '')}".strip()
+                     for contact in crm_contacts]
+        linkedin_emails = [(contact.get('email', '') or '').lower().strip() for contact in linkedin_contacts]
+        crm_emails = [(contact.get('emailaddress1', '') or '').lower().strip() for contact in crm_contacts]
+        linkedin_companies = [current_pos.split(' at ')[-1] if current_pos and ' at ' in current_pos else ''
+                              for current_pos in (contact.get('current_position', '') for contact in linkedin_contacts)]
+        crm_companies = [contact.get('companyname', '') or '' for contact in crm_contacts]
+        
+        name_scores = pairwise_similarity(linkedin_names, crm_names)
+        company_scores = pairwise_similarity(linkedin_companies, crm_companies)
+        email_matches = np.fromiter((bool(li) and li == crm for li, crm in zip(linkedin_emails, crm_emails)),
+                                    dtype=bool, count=len(linkedin_emails))
+        
+        scores = name_scores * 0.4 + email_matches * 0.4 + company_scores * 0.2
+        # Boost score for exact email matches
+        scores = np.where(email_matches, np.minimum(1.0, scores + 0.3), scores)
+        
+        reported = (scores >= self.fuzzy_min_score) & ((name_scores >= self.fuzzy_min_name_similarity) | email_matches)
+        
+        matches = []
+        for pair in np.flatnonzero(reported).tolist():
+            linkedin_contact = linkedin_contacts[pair]
+            crm_contact = crm_contacts[pair]
+            matches.append({
+                'confidence_score': float(scores[pair]),
+                'crm_contact': {
+                    'id': f"crm_{candidate_pairs.crm_idx[pair]}",
+                    'full_name': crm_names[pair],
+                    'email': crm_emails[pair],
+                    'company': crm_companies[pair],
+                    'job_title': crm_contact.get('jobtitle', '') or '',
+                    'phone': crm_contact.get('telephone1', '') or crm_contact.get('mobilephone', '') or '',
+                    'source_data': crm_contact
+                },
+                'linkedin_profile': {
+                    'id': f"linkedin_{candidate_pairs.linkedin_idx[pair]}",
+                    'full_name': linkedin_names[pair],
+                    'email': linkedin_emails[pair],
+                    'company': linkedin_companies[pair],
+                    'job_title': linkedin_contact.get('headline', '') or '',
+                    'profile_url': linkedin_contact.get('profile_url', ''),
+                    'source_data': linkedin_contact
+                },
+                'match_reasons': [f"Blocked by {candidate_pairs.reason_vocab[candidate_pairs.reason_code[pair]]}"]
+            })
+        
+        matches.sort(key=lambda x: x['confidence_score'], reverse=True)
+        return matches
+    
+    def _ranking_scorer(self, candidate_count: int) -> str:
+        """Name the scorer stage 2 uses: "rapidfuzz" or "difflib" for direct scoring, else "dedupe"."""
+        if process is not None:
+            return "rapidfuzz"
+        # Training dedupe doesn't pay off for a few thousand blocked pairs
+        return "difflib" if candidate_count < self.dedupe_fast_threshold else "dedupe"
+    
+    async def _run_dedupe_stage(self, candidate_pairs: CandidateBatch) -> Dict[str, Any]:
+        """Run the candidate ranking stage.
         
-        # Use existing dedupe functionality
-        data_dict = self.dedupe_finder.prepare_data_for_dedupe(crm_contacts, linkedin_contacts)
-        deduper = self.dedupe_finder.train_dedupe_model(data_dict)
-        clustered_dupes = self.dedupe_finder.find_duplicates(data_dict, deduper)
-        matches = self.dedupe_finder.analyze_duplicates(clustered_dupes, data_dict)
+        Pairs are scored directly (rapidfuzz, or difflib below
+        ``dedupe_fast_threshold`` pairs); only large candidate sets without
+        rapidfuzz train the dedupe model. The stats record which scorer ran.
+        """
+        scorer = self._ranking_scorer(len(candidate_pairs))
+        if scorer != "dedupe":
+            self.logger.info(f"Scoring {len(candidate_pairs):,} candidate pairs directly with {scorer}")
+            matches = self._score_pairs_directly(candidate_pairs)
+        else:
+            # Convert candidate pairs to dedupe format
+            linkedin_contacts = [candidate_pairs.linkedin_contacts[i] for i in candidate_pairs.linkedin_idx.tolist()]
+            crm_contacts = [candidate_pairs.crm_contacts[i] for i in candidate_pairs.crm_idx.tolist()]
+            
+            # Use existing dedupe functionality
+            self.logger.info(f"Ranking {len(candidate_pairs):,} candidate pairs with a trained dedupe model")
+            data_dict = self.dedupe_finder.prepare_data_for_dedupe(crm_contacts, linkedin_contacts)
+            deduper = self.dedupe_finder.train_dedupe_model(data_dict)
+            clustered_dupes = self.dedupe_finder.find_duplicates(data_dict, deduper)
+            matches = self.dedupe_finder.analyze_duplicates(clustered_dupes, data_dict)
         
         # Categorize matches by confidence
         high_confidence = [m for m in matches if m['confidence_score'] >= self.dedupe_threshold_high]
         medium_confidence = [m for m in matches if self.dedupe_threshold_medium <= m['confidence_score'] < self.dedupe_threshold_high]
         low_confidence = [m for m in matches if m['confidence_score'] < self.dedupe_threshold_medium]
         
-        self.logger.info(f"Dedupe results: {len(high_confidence)} high, {len(medium_confidence)} medium, {len(low_confidence)} low confidence")
+        self.logger.info(f"Ranking results ({scorer}): {len(high_confidence)} high, {len(medium_confidence)} medium, {len(low_confidence)} low confidence")
         
         return {
+            "scorer": scorer,
             "total_matches": len(matches),
             "high_confidence_pairs": high_confidence,
             "medium_confidence_pairs": medium_confidence,
@@ -355,8 +744,8 @@ class MultiStageDuplicateDetector:
             "ai_rejections": []
         }
         
-        # Auto-accept high confidence dedupe matches
-        self.logger.info(f"Auto-accepting {len(high_confidence_pairs)} high-confidence dedupe matches")
+        # Auto-accept high confidence ranked matches
+        self.logger.info(f"Auto-accepting {len(high_confidence_pairs)} high-confidence ranked matches")
         
         # AI verification for medium confidence matches (limited by max_ai_comparisons)
         pairs_to_verify = medium_confidence_pairs[:self.max_ai_comparisons]
@@ -364,17 +753,36 @@ class MultiStageDuplicateDetector:
         
         self.logger.info(f"AI verifying {len(pairs_to_verify)} medium-confidence pairs")
         
-        for i, match in enumerate(pairs_to_verify):
-            if i % 100 == 0:
-                self.logger.info(f"AI verification progress: {i}/{len(pairs_to_verify)}")
+        # The comparisons are independent Ollama round trips, so keep several in flight
+        semaphore = asyncio.Semaphore(self.ai_concurrency)
+        completed = 0
+        
+        async def verify(batch: List[Dict]):
+            nonlocal completed
+            async with semaphore:
+                try:
+                    # Convert match format for AI detector
+                    return await self.ai_detector.compare_contacts_batch(
+                        [(match['linkedin_profile']['source_data'], match['crm_contact']['source_data']) for match in batch]
+                    )
+                except Exception as e:
+                    self.logger.error(f"Error in AI verification: {str(e)}")
+                    return [None] * len(batch)
+                finally:
+                    completed += len(batch)
+                    if completed % 100 < len(batch):
+                        self.logger.info(f"AI verification progress: {completed}/{len(pairs_to_verify)}")
+        
+        # Several pairs per request, several requests in flight
+        batches = [pairs_to_verify[i:i + self.ai_batch_size] for i in range(0, len(pairs_to_verify), self.ai_batch_size)]
+        ai_outcomes = [ai_result for batch_results in await asyncio.gather(*(verify(batch) for batch in batches))
+                       for ai_result in batch_results]
+        
+        for match, ai_result in zip(pairs_to_verify, ai_outcomes):
+            if ai_result is None:
+                continue
             
             try:
-                # Convert match format for AI detector
-                linkedin_contact = match['linkedin_profile']['source_data']
-                crm_contact = match['crm_contact']['source_data']
-                
-                ai_result = await self.ai_detector.compare_contacts(linkedin_contact, crm_contact)
-                
                 ai_match_data = {
                     "original_dedupe_match": match,
                     "ai_result": ai_result.dict(),
@@ -425,6 +833,60 @@ class MultiStageDuplicateDetector:
         results["pipeline_stats"]["high_confidence_matches"] = len(final_results["high_confidence_matches"])
         results["pipeline_stats"]["medium_confidence_matches"] = len(final_results["medium_confidence_matches"])
         results["pipeline_stats"]["low_confidence_matches"] = len(final_results["low_confidence_matches"])
+        
+        # Group high/medium matches sharing a contact, so merges can be applied per cluster
+        final_results["clusters"] = self._cluster_matches(
+            final_results["high_confidence_matches"] + final_results["medium_confidence_matches"]
+        )
+        results["pipeline_stats"]["clusters_found"] = len(final_results["clusters"])
+    
+    def _cluster_matches(self, matches: List[Dict]) -> List[Dict]:
+        """Group matches into clusters of transitively matching contacts.
+        
+        LinkedIn and CRM contacts are the nodes of a bipartite graph with one
+        edge per match; each connected component is one cluster.
+        """
+        if not matches:
+            return []
+        
+        linkedin_nodes = {}
+        crm_nodes = {}
+        edges = []
+        for match in matches:
+            # AI verified matches wrap the original ranking match
+            original = match.get("original_dedupe_match", match)
+            linkedin_contact = original['linkedin_profile']['source_data']
+            crm_contact = original['crm_contact']['source_data']
+            linkedin_node = linkedin_nodes.setdefault(id(linkedin_contact), (len(linkedin_nodes), linkedin_contact))[0]
+            crm_node = crm_nodes.setdefault(id(crm_contact), (len(crm_nodes), crm_contact))[0]
+            edges.append((linkedin_node, crm_node, match.get("combined_confidence", original['confidence_score'])))
+        
+        linkedin_count = len(linkedin_nodes)
+        node_count = linkedin_count + len(crm_nodes)
+        rows = np.array([edge[0] for edge in edges])
+        cols = np.array([edge[1] for edge in edges]) + linkedin_count
+        graph = csr_matrix((np.ones(len(edges)), (rows, cols)), shape=(node_count, node_count))
+        cluster_count, labels = connected_components(graph, directed=False)
+        
+        clusters = [{"linkedin_contacts": [], "crm_contacts": [], "match_count": 0, "max_confidence": 0.0}
+                    for _ in range(cluster_count)]
+        for node, linkedin_contact in linkedin_nodes.values():
+            clusters[labels[node]]["linkedin_contacts"].append({
+                "full_name": linkedin_contact.get('full_name', ''),
+                "profile_url": linkedin_contact.get('profile_url', '')
+            })
+        for node, crm_contact in crm_nodes.values():
+            clusters[labels[linkedin_count + node]]["crm_contacts"].append({
+                "contactid": crm_contact.get('contactid', ''),
+                "fullname": crm_contact.get('fullname', '')
+            })
+        for linkedin_node, _, confidence in edges:
+            cluster = clusters[labels[linkedin_node]]
+            cluster["match_count"] += 1
+            cluster["max_confidence"] = max(cluster["max_confidence"], float(confidence))
+        
+        clusters.sort(key=lambda cluster: cluster["max_confidence"], reverse=True)
+        return clusters
     
     def _print_pipeline_summary(self, results: Dict):
         """Print a comprehensive summary of the pipeline results."""
@@ -448,6 +910,7 @@ class MultiStageDuplicateDetector:
         print(f"   Medium confidence matches: {stats['medium_confidence_matches']}")
         print(f"   Low confidence matches: {stats['low_confidence_matches']}")
         print(f"   Total matches found: {stats['total_matches_found']}")
+        print(f"   Contact clusters: {stats.get('clusters_found', 0)}")
         
         if results["stage_3_ai"]:
             ai_stats = results["stage_3_ai"]
@@ -467,8 +930,7 @@ class MultiStageDuplicateDetector:
         # Add timestamp
         results["analysis_timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        save_json(output_path, results)
         
         file_size = output_path.stat().st_size / 1024 / 1024
         self.logger.info(f"Results saved to {output_path} ({file_size:.1f} MB)")
@@ -507,14 +969,10 @@ async def main():
     
     try:
         # Load LinkedIn contacts
-        with open(linkedin_file, 'r', encoding='utf-8') as f:
-            linkedin_data = json.load(f)
-        linkedin_contacts = linkedin_data.get('profiles', [])
+        linkedin_contacts = load_json_items(linkedin_file, 'profiles')
         
         # Load CRM contacts
-        with open(crm_file, 'r', encoding='utf-8') as f:
-            crm_data = json.load(f)
-        crm_contacts = crm_data.get('contacts', [])
+        crm_contacts = load_json_items(crm_file, 'contacts')
         
         if not linkedin_contacts:
             print("❌ No LinkedIn contacts found")
@@ -544,6 +1002,5 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     success = asyncio.run(main())
     exit(0 if success else 1)
\ No newline at end of file
@@ -11,13 +11,176 @@ Uses the dedupe library for machine learning-based record linkage.
 
 import json
 import logging
+import math
 import os
+import random
 import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import islice, product
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Any, Tuple
 import dedupe
+import numpy as np
+from scipy.cluster.hierarchy import DisjointSet
 from unidecode import unidecode
 
+try:
+    import ijson
+except ImportError:  # without ijson, input files are parsed in one go
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is used instead
+    orjson = None
+
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import JaroWinkler
+except ImportError:  # without rapidfuzz, name similarity uses difflib
+    process = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # without pyarrow, fields are normalized one value at a time
+    pa = None
+
+
+# normalize_text patterns, compiled once instead of on every call
+_WS_PATTERN = r'[ \t\n\r\f\v\x1c-\x1f]+'  # what \s matches in ASCII text, spelled out for Arrow's RE2
+_TITLE_PATTERN = r'\b(dr|prof|mr|mrs|ms)\.\s*'
+_SUFFIX_PATTERN = r'\b(gmbh|ag|ltd|inc|corp|llc)\b'
+_WS_RE = re.compile(r'\s+')
+_TITLE_RE = re.compile(_TITLE_PATTERN)
+_SUFFIX_RE = re.compile(_SUFFIX_PATTERN)
+
+# Soundex digit per consonant; vowels, h, w and y have no code
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6'
+}
+
+
+def iter_json_items(path: Path, key: str) -> Iterator[Any]:
+    """Yield the items of the ``key`` array of a JSON data file.
+    
+    With ijson installed the file is parsed incrementally, so only the items
+    not yet consumed are held in memory rather than the whole document.
+    """
+    with open(path, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, f"{key}.item", use_float=True)
+        else:
+            yield from json.load(f).get(key, [])
+
+
+def name_similarities(left: List[str], right: List[str]) -> List[float]:
+    """Similarity (0-1) of each ``left[i]``/``right[i]`` name pair.
+    
+    Jaro-Winkler over all pairs in one rapidfuzz ``cpdist`` call when
+    installed, else difflib's ratio pair by pair.
+    """
+    if process is not None:
+        return process.cpdist(left, right, scorer=JaroWinkler.normalized_similarity, workers=-1).tolist()
+    return [SequenceMatcher(None, a, b).ratio() if a and b else 0.0 for a, b in zip(left, right)]
+
+
+def normalize_column(texts: List[Any]) -> List[str]:
+    """Normalize a whole column of values, same result as ``normalize_text`` per value.
+    
+    With pyarrow installed, lowercasing and the regex substitutions run as
+    compute kernels over one string array; only non-ASCII values go through
+    unidecode in Python.
+    """
+    if pa is None:
+        return [_normalize_text(str(text)) if text else None for text in texts]
+    
+    column = pa.array([str(text) if text else "" for text in texts], pa.string())
+    non_ascii = pc.invert(pc.string_is_ascii(column))
+    transliterated = [unidecode(text.lower()) for text in column.filter(non_ascii).to_pylist()]
+    column = pc.replace_with_mask(pc.ascii_lower(column), non_ascii, pa.array(transliterated, pa.string()))
+    
+    # Whitespace runs all become a single space, so trimming spaces is the same as strip()
+    column = pc.utf8_trim(pc.replace_substring_regex(column, _WS_PATTERN, ' '), characters=' ')
+    column = pc.replace_substring_regex(column, _TITLE_PATTERN, '')
+    column = pc.replace_substring_regex(column, _SUFFIX_PATTERN, '')
+    column = pc.utf8_trim(column, characters=' ')
+    
+    return [text or None for text in column.to_pylist()]
+
+
+@lru_cache(maxsize=65536)
+def name_tokens(name: str) -> frozenset:
+    """Words longer than two characters of a lowercased name, cached per name."""
+    return frozenset(word for word in name.split() if len(word) > 2)
+
+
+@lru_cache(maxsize=65536)
+def email_local_part(email: str) -> str:
+    """The part before the @ of a lowercased email, cached per address."""
+    return email.split('@', 1)[0]
+
+
+@lru_cache(maxsize=65536)
+def _normalize_text(text: str) -> str:
+    """Normalize text for better matching, or None if nothing is left.
+    
+    Cached, as countries, cities, companies and job titles repeat across contacts.
+    """
+    if not text.strip():
+        return None
+    
+    # Convert to lowercase, remove accents (plain ASCII has none)
+    text = text.lower()
+    if not text.isascii():
+        text = unidecode(text)
+    
+    # Remove extra whitespace
+    text = _WS_RE.sub(' ', text).strip()
+    
+    # Remove common suffixes/prefixes
+    text = _TITLE_RE.sub('', text)
+    text = _SUFFIX_RE.sub('', text)
+    
+    # Return None if the result is empty after normalization
+    result = text.strip()
+    return result if result else None
+
+
+def key_field_mask(full_name, first_name, last_name, email, company, job_title) -> int:
+    """One bit per non-empty key field, for the record validity check."""
+    return (bool(full_name) | bool(first_name) << 1 | bool(last_name) << 2
+            | bool(email) << 3 | bool(company) << 4 | bool(job_title) << 5)
+
+
+def soundex(name: str) -> str:
+    """American Soundex code of a (normalized, ASCII) name, or '' if it has no letters."""
+    letters = [c for c in name.lower() if c.isalpha()]
+    if not letters:
+        return ''
+    
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w don't separate equal codes, vowels do
+        if letter not in 'hw':
+            previous = digit
+    
+    return code.ljust(4, '0')
+
 
 class DuplicateFinder:
     """Find duplicates between CRM contacts and LinkedIn profiles using dedupe."""
@@ -28,151 +191,212 @@ class DuplicateFinder:
         self.linkedin_file = Path("data/linkedin_profiles_detailed.json")
         self.training_file = Path("data/dedupe_training.json")
         self.settings_file = Path("data/dedupe_learned_settings")
-        
+        self.max_block_size = 200  # larger blocks (e.g. a common soundex code) are split by a finer key
+        self.prepare_batch_size = 10000  # records normalized per column pass while streaming
+        self.parallel_min_texts = 50000  # field values normalized in worker processes from this many on
+        self.sidecar = {}  # record_id -> (source, original_data), kept out of the records dedupe pickles
+        self.record_ids = {'crm': [], 'linkedin': []}  # prepared record ids per source
+        self.email_index = {'crm': {}, 'linkedin': {}}  # email -> prepared record ids per source
+        self.link_threshold = 0.8  # blocked pairs scoring at least this are linked without dedupe
+        self.ambiguous_threshold = 0.45  # blocked pairs between this and link_threshold are left to dedupe
+        self.dedupe_threshold = 0.5  # dedupe match probability for clustering the ambiguous pairs
+        
+    def iter_crm_contacts(self) -> Iterator[Dict]:
+        """Stream CRM contacts from the export file."""
+        return iter_json_items(self.crm_file, 'contacts')
+    
+    def iter_linkedin_profiles(self) -> Iterator[Dict]:
+        """Stream LinkedIn profiles from the scraped profiles file."""
+        return iter_json_items(self.linkedin_file, 'profiles')
+    
     def load_data(self) -> Tuple[List[Dict], List[Dict]]:
         """Load CRM contacts and LinkedIn profiles."""
         self.logger.info("Loading CRM contacts...")
-        with open(self.crm_file, 'r', encoding='utf-8') as f:
-            crm_data = json.load(f)
-        
-        crm_contacts = crm_data.get('contacts', [])
+        crm_contacts = list(self.iter_crm_contacts())
         self.logger.info(f"Loaded {len(crm_contacts)} CRM contacts")
         
         self.logger.info("Loading LinkedIn profiles...")
-        with open(self.linkedin_file, 'r', encoding='utf-8') as f:
-            linkedin_data = json.load(f)
-        
-        linkedin_profiles = linkedin_data.get('profiles', [])
+        linkedin_profiles = list(self.iter_linkedin_profiles())
         self.logger.info(f"Loaded {len(linkedin_profiles)} LinkedIn profiles")
         
         return crm_contacts, linkedin_profiles
     
     def normalize_text(self, text: str) -> str:
         """Normalize text for better matching."""
-        if not text or not str(text).strip():
+        if not text:
             return None  # Return None for empty strings to avoid dedupe errors
-        
-        # Convert to string and lowercase, remove accents
-        text = unidecode(str(text).lower())
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Remove common suffixes/prefixes
-        text = re.sub(r'\b(dr|prof|mr|mrs|ms)\.\s*', '', text)
-        text = re.sub(r'\b(gmbh|ag|ltd|inc|corp|llc)\b', '', text)
-        
-        # Return None if the result is empty after normalization
-        result = text.strip()
-        return result if result else None
-    
-    def prepare_crm_record(self, contact: Dict[str, Any], record_id: int) -> Dict[str, Any]:
-        """Prepare a CRM contact record for dedupe processing."""
-        # Extract and normalize key fields
-        first_name = self.normalize_text(contact.get('firstname', ''))
-        last_name = self.normalize_text(contact.get('lastname', ''))
-        full_name = self.normalize_text(contact.get('fullname', ''))
-        
-        # If no full name, construct from first/last
-        if not full_name and (first_name or last_name):
-            full_name = f"{first_name} {last_name}".strip()
-        
-        email = self.normalize_text(contact.get('emailaddress1', ''))
-        phone = self.normalize_text(contact.get('telephone1', '') or contact.get('mobilephone', ''))
-        company = self.normalize_text(contact.get('companyname', ''))
-        job_title = self.normalize_text(contact.get('jobtitle', ''))
-        
-        # Create address string
-        address_parts = [
-            contact.get('address1_line1', ''),
-            contact.get('address1_city', ''),
-            contact.get('address1_country', '')
-        ]
-        address = self.normalize_text(' '.join(filter(None, address_parts)))
-        
-        return {
-            'record_id': f"crm_{record_id}",
-            'source': 'crm',
-            'full_name': full_name,
-            'first_name': first_name,
-            'last_name': last_name,
-            'email': email,
-            'phone': phone,
-            'company': company,
-            'job_title': job_title,
-            'address': address,
-            'original_data': contact
-        }
+        return _normalize_text(str(text))
     
-    def prepare_linkedin_record(self, profile: Dict[str, Any], record_id: int) -> Dict[str, Any]:
-        """Prepare a LinkedIn profile record for dedupe processing."""
-        full_name = self.normalize_text(profile.get('full_name', ''))
-        
-        # Try to extract first/last name from full name
-        name_parts = full_name.split()
-        first_name = name_parts[0] if name_parts else ''
-        last_name = name_parts[-1] if len(name_parts) > 1 else ''
-        
-        # Extract email from contact info
-        contact_info = profile.get('contact_info', [])
-        email = ''
-        if contact_info and len(contact_info) > 0:
-            email = self.normalize_text(contact_info[0])
-        
-        # Extract company from current position
-        current_position = profile.get('current_position', '')
-        company = ''
-        if current_position and ' at ' in current_position:
-            company = self.normalize_text(current_position.split(' at ')[-1])
-        
-        job_title = self.normalize_text(profile.get('headline', ''))
-        location = self.normalize_text(profile.get('location', ''))
-        
-        return {
-            'record_id': f"linkedin_{record_id}",
-            'source': 'linkedin',
-            'full_name': full_name,
-            'first_name': first_name,
-            'last_name': last_name,
-            'email': email,
-            'phone': '',  # LinkedIn profiles typically don't have phone numbers
-            'company': company,
-            'job_title': job_title,
-            'address': location,
-            'original_data': profile
-        }
+    def normalize_many(self, texts: List[Any]) -> List[str]:
+        """Normalize a whole column of values, in worker processes for large columns.
+        
+        Only the field values and their normalized strings cross the process
+        boundary, never the contact dicts.
+        """
+        workers = os.cpu_count() or 1
+        if workers < 2 or len(texts) < self.parallel_min_texts:
+            return normalize_column(texts)
+        
+        chunk_size = math.ceil(len(texts) / workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return [text for chunk_texts in executor.map(normalize_column, chunks) for text in chunk_texts]
+    
+    def normalize_columns(self, *columns: List[Any]) -> List[List[str]]:
+        """Normalize several equally long columns in one ``normalize_many`` call."""
+        normalized = self.normalize_many([text for column in columns for text in column])
+        size = len(columns[0]) if columns else 0
+        return [normalized[i:i + size] for i in range(0, len(normalized), size)] if size else [[] for _ in columns]
+    
+    def prepare_crm_records(self, contacts: List[Dict[str, Any]], start_id: int = 0) -> List[Dict[str, Any]]:
+        """Prepare CRM contact records for dedupe processing, one field column at a time."""
+        # Extract and normalize key fields, plus address strings
+        first_names, last_names, full_names, emails, phones, companies, job_titles, addresses = self.normalize_columns(
+            [contact.get('firstname', '') for contact in contacts],
+            [contact.get('lastname', '') for contact in contacts],
+            [contact.get('fullname', '') for contact in contacts],
+            [contact.get('emailaddress1', '') for contact in contacts],
+            [contact.get('telephone1', '') or contact.get('mobilephone', '') for contact in contacts],
+            [contact.get('companyname', '') for contact in contacts],
+            [contact.get('jobtitle', '') for contact in contacts],
+            [
+                ' '.join(filter(None, (
+                    contact.get('address1_line1', ''),
+                    contact.get('address1_city', ''),
+                    contact.get('address1_country', '')
+                )))
+                for contact in contacts
+            ]
+        )
+        
+        records = []
+        for i, contact in enumerate(contacts):
+            first_name = first_names[i]
+            last_name = last_names[i]
+            full_name = full_names[i]
+            
+            # If no full name, construct from first/last
+            if not full_name and (first_name or last_name):
+                full_name = f"{first_name} {last_name}".strip()
+            
+            records.append({
+                'record_id': f"crm_{start_id + i}",
+                'source': 'crm',
+                'full_name': full_name,
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': emails[i],
+                'phone': phones[i],
+                'company': companies[i],
+                'job_title': job_titles[i],
+                'address': addresses[i],
+                'field_mask': key_field_mask(full_name, first_name, last_name, emails[i], companies[i], job_titles[i]),
+                'original_data': contact
+            })
+        
+        return records
+    
+    def prepare_linkedin_records(self, profiles: List[Dict[str, Any]], start_id: int = 0) -> List[Dict[str, Any]]:
+        """Prepare LinkedIn profile records for dedupe processing, one field column at a time."""
+        # Email from the contact info, company from the current position
+        positions = [profile.get('current_position', '') for profile in profiles]
+        full_names, emails, companies, job_titles, locations = self.normalize_columns(
+            [profile.get('full_name', '') for profile in profiles],
+            [(profile.get('contact_info') or [''])[0] for profile in profiles],
+            [position.split(' at ')[-1] if position and ' at ' in position else '' for position in positions],
+            [profile.get('headline', '') for profile in profiles],
+            [profile.get('location', '') for profile in profiles]
+        )
+        
+        records = []
+        for i, profile in enumerate(profiles):
+            full_name = full_names[i]
+            
+            # Try to extract first/last name from full name
+            name_parts = full_name.split() if full_name else []
+            first_name = name_parts[0] if name_parts else ''
+            last_name = name_parts[-1] if len(name_parts) > 1 else ''
+            
+            email = emails[i] if profile.get('contact_info') else ''
+            company = companies[i] if positions[i] and ' at ' in positions[i] else ''
+            
+            records.append({
+                'record_id': f"linkedin_{start_id + i}",
+                'source': 'linkedin',
+                'full_name': full_name,
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': email,
+                'phone': '',  # LinkedIn profiles typically don't have phone numbers
+                'company': company,
+                'job_title': job_titles[i],
+                'address': locations[i],
+                'field_mask': key_field_mask(full_name, first_name, last_name, email, company, job_titles[i]),
+                'original_data': profile
+            })
+        
+        return records
     
     def is_record_valid(self, record: Dict[str, Any]) -> bool:
         """Check if a record has enough non-empty fields for dedupe processing."""
-        key_fields = ['full_name', 'first_name', 'last_name', 'email', 'company', 'job_title']
-        non_empty_count = sum(1 for field in key_fields if record.get(field))
-        
-        # Require at least 2 non-empty key fields
-        return non_empty_count >= 2
+        # Require at least 2 non-empty key fields, i.e. two bits set in the mask
+        mask = record['field_mask']
+        return mask & (mask - 1) != 0
+    
+    def iter_prepared_records(self, items: Iterable[Dict], prepare) -> Iterator[Dict[str, Any]]:
+        """Prepare a stream of contacts or profiles a batch at a time."""
+        items = iter(items)
+        start_id = 0
+        while batch := list(islice(items, self.prepare_batch_size)):
+            yield from prepare(batch, start_id)
+            start_id += len(batch)
     
-    def prepare_data_for_dedupe(self, crm_contacts: List[Dict], linkedin_profiles: List[Dict]) -> Dict[str, Dict]:
-        """Prepare all data for dedupe processing."""
+    def add_record(self, data_dict: Dict[str, Dict], prepared: Dict[str, Any]):
+        """Add a prepared record's matching fields to ``data_dict`` and the rest to the sidecar."""
+        record_id = prepared.pop('record_id')
+        source = prepared.pop('source')
+        del prepared['field_mask']
+        self.sidecar[record_id] = (source, prepared.pop('original_data'))
+        data_dict[record_id] = prepared
+        
+        self.record_ids[source].append(record_id)
+        email = prepared['email']
+        if email and '@' in email:
+            self.email_index[source].setdefault(email, []).append(record_id)
+    
+    def source_of(self, record_id: str) -> str:
+        """Return 'crm' or 'linkedin' for a prepared record."""
+        return self.sidecar[record_id][0]
+    
+    def prepare_data_for_dedupe(self, crm_contacts: Iterable[Dict], linkedin_profiles: Iterable[Dict]) -> Dict[str, Dict]:
+        """Prepare all data for dedupe processing.
+        
+        Both inputs may be streams (see ``iter_crm_contacts``); only valid
+        records are kept, so skipped ones are freed batch by batch. The
+        returned records hold only the matching fields; source and original
+        data go to ``self.sidecar``, and the ids are indexed per source in
+        ``self.record_ids`` and ``self.email_index``.
+        """
         self.logger.info("Preparing data for dedupe...")
         
         data_dict = {}
+        self.sidecar = {}
+        self.record_ids = {'crm': [], 'linkedin': []}
+        self.email_index = {'crm': {}, 'linkedin': {}}
         skipped_records = 0
         
         # Process CRM contacts
-        for i, contact in enumerate(crm_contacts):
-            prepared = self.prepare_crm_record(contact, i)
-            
+        for i, prepared in enumerate(self.iter_prepared_records(crm_contacts, self.prepare_crm_records)):
             if self.is_record_valid(prepared):
-                data_dict[prepared['record_id']] = prepared
+                self.add_record(data_dict, prepared)
             else:
                 skipped_records += 1
                 self.logger.debug(f"Skipped CRM record {i} - insufficient data")
         
         # Process LinkedIn profiles
-        for i, profile in enumerate(linkedin_profiles):
-            prepared = self.prepare_linkedin_record(profile, i)
-            
+        for i, prepared in enumerate(self.iter_prepared_records(linkedin_profiles, self.prepare_linkedin_records)):
             if self.is_record_valid(prepared):
-                data_dict[prepared['record_id']] = prepared
+                self.add_record(data_dict, prepared)
             else:
                 skipped_records += 1
                 self.logger.debug(f"Skipped LinkedIn record {i} - insufficient data")
@@ -276,70 +500,211 @@ class DuplicateFinder:
         """Create automatic training pairs based on exact matches."""
         training_pairs = []
         
-        # Find exact email matches between CRM and LinkedIn
-        crm_emails = {}
-        linkedin_emails = {}
-        
-        for record_id, record in data_dict.items():
-            email = record.get('email', '').strip()
-            if email and '@' in email:
-                if record['source'] == 'crm':
-                    crm_emails[email] = record_id
-                else:
-                    linkedin_emails[email] = record_id
-        
-        # Create positive examples from email matches
-        for email in crm_emails:
-            if email in linkedin_emails:
-                crm_id = crm_emails[email]
-                linkedin_id = linkedin_emails[email]
-                
+        # Create positive examples from exact email matches between CRM and LinkedIn
+        crm_emails = self.email_index['crm']
+        linkedin_emails = self.email_index['linkedin']
+        for email in sorted(crm_emails.keys() & linkedin_emails.keys()):
+            for crm_id, linkedin_id in product(crm_emails[email], linkedin_emails[email]):
                 training_pairs.append({
                     'match': True,
                     'record_1': data_dict[crm_id],
                     'record_2': data_dict[linkedin_id]
                 })
         
-        # Create negative examples from obviously different records
-        crm_records = [r for r in data_dict.values() if r['source'] == 'crm']
-        linkedin_records = [r for r in data_dict.values() if r['source'] == 'linkedin']
-        
+        # Create negative examples from obviously different records: index the LinkedIn
+        # name words once, then any profile sharing no word with a CRM name is a candidate
+        linkedin_ids = []
+        token_to_linkedin = defaultdict(set)
+        for record_id in self.record_ids['linkedin']:
+            name = data_dict[record_id].get('full_name') or ''
+            if len(name) > 3:
+                linkedin_ids.append(record_id)
+                for word in name_tokens(name):
+                    token_to_linkedin[word].add(record_id)
+        
+        rng = random.Random(0)  # same training examples on every run
         negative_count = 0
-        for crm_record in crm_records[:10]:  # Limited to avoid too many examples
-            for linkedin_record in linkedin_records[:10]:
-                # Check if they're obviously different
-                crm_name = crm_record.get('full_name', '').lower()
-                linkedin_name = linkedin_record.get('full_name', '').lower()
-                
-                if (crm_name and linkedin_name and 
-                    len(crm_name) > 3 and len(linkedin_name) > 3 and
-                    not any(word in linkedin_name for word in crm_name.split() if len(word) > 2)):
-                    
-                    training_pairs.append({
-                        'match': False,
-                        'record_1': crm_record,
-                        'record_2': linkedin_record
-                    })
-                    
-                    negative_count += 1
-                    if negative_count >= 20:  # Limit negative examples
-                        break
+        for record_id in self.record_ids['crm']:
+            record = data_dict[record_id]
+            crm_name = record.get('full_name') or ''
+            if len(crm_name) <= 3:
+                continue
+            
+            overlapping = set().union(*(token_to_linkedin.get(word, ()) for word in name_tokens(crm_name)))
+            candidates = [linkedin_id for linkedin_id in linkedin_ids if linkedin_id not in overlapping]
+            if not candidates:
+                continue
+            
+            training_pairs.append({
+                'match': False,
+                'record_1': record,
+                'record_2': data_dict[rng.choice(candidates)]
+            })
             
-            if negative_count >= 20:
+            negative_count += 1
+            if negative_count >= 20:  # Limit negative examples
                 break
         
         return training_pairs
     
+    def build_blocks(self, data_dict: Dict[str, Dict]) -> Dict[Tuple, List[str]]:
+        """Group record ids by deterministic keys: email, last name + first initial and last name soundex."""
+        blocks = defaultdict(list)
+        
+        for record_id, record in data_dict.items():
+            email = record.get('email')
+            if email and '@' in email:
+                blocks[('email', email.lower())].append(record_id)
+            
+            last_name = record.get('last_name')
+            if last_name:
+                first_name = record.get('first_name') or ''
+                blocks[('name', last_name, first_name[:1])].append(record_id)
+                
+                code = soundex(last_name)
+                if code:
+                    blocks[('soundex', code)].append(record_id)
+        
+        return blocks
+    
+    def get_candidate_pairs(self, data_dict: Dict[str, Dict], blocks: Dict[Tuple, List[str]]) -> set:
+        """Collect the (CRM id, LinkedIn id) pairs that share at least one block.
+        
+        The records of a block over ``max_block_size`` are re-blocked on last
+        name soundex + first initial + company prefix instead; finer blocks
+        that are still too large add no pairs.
+        """
+        candidate_pairs = set()
+        oversized_blocks = 0
+        finer_blocks = defaultdict(list)
+        
+        for record_ids in blocks.values():
+            if len(record_ids) > self.max_block_size:
+                oversized_blocks += 1
+                for record_id in record_ids:
+                    record = data_dict[record_id]
+                    last_name = record.get('last_name')
+                    if last_name:
+                        key = (soundex(last_name), (record.get('first_name') or '')[:1], (record.get('company') or '')[:3])
+                        finer_blocks[key].append(record_id)
+                continue
+            
+            crm_ids = [record_id for record_id in record_ids if self.source_of(record_id) == 'crm']
+            linkedin_ids = [record_id for record_id in record_ids if self.source_of(record_id) == 'linkedin']
+            candidate_pairs.update((crm_id, linkedin_id) for crm_id in crm_ids for linkedin_id in linkedin_ids)
+        
+        for record_ids in finer_blocks.values():
+            if len(record_ids) > self.max_block_size:
+                continue
+            
+            # A record in several oversized blocks lands in its finer block more than once
+            record_ids = dict.fromkeys(record_ids)
+            crm_ids = [record_id for record_id in record_ids if self.source_of(record_id) == 'crm']
+            linkedin_ids = [record_id for record_id in record_ids if self.source_of(record_id) == 'linkedin']
+            candidate_pairs.update((crm_id, linkedin_id) for crm_id in crm_ids for linkedin_id in linkedin_ids)
+        
+        if oversized_blocks:
+            self.logger.info(f"Split {oversized_blocks} blocks with more than {self.max_block_size} records into {len(finer_blocks)} finer blocks")
+        
+        return candidate_pairs
+    
+    def score_pairs(self, data_dict: Dict[str, Dict], pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """Cheap composite similarity (0-1) per (CRM id, LinkedIn id) pair.
+        
+        Weighted sum of name similarity, company equality and email username
+        equality, computed as whole arrays. Exact email matches are resolved
+        before scoring, so the full address never matches here; an identical
+        name and company (0.85) is enough to link a pair, either alone is not.
+        """
+        crm_records = [data_dict[crm_id] for crm_id, _ in pairs]
+        linkedin_records = [data_dict[linkedin_id] for _, linkedin_id in pairs]
+        
+        name_similarity = np.asarray(name_similarities(
+            [record.get('full_name') or '' for record in crm_records],
+            [record.get('full_name') or '' for record in linkedin_records]
+        ), dtype=np.float32)
+        same_username = np.fromiter(
+            (bool(crm.get('email')) and bool(linkedin.get('email'))
+             and email_local_part(crm['email']) == email_local_part(linkedin['email'])
+             for crm, linkedin in zip(crm_records, linkedin_records)),
+            dtype=np.float32, count=len(pairs)
+        )
+        same_company = np.fromiter(
+            (bool(crm.get('company')) and crm.get('company') == linkedin.get('company')
+             for crm, linkedin in zip(crm_records, linkedin_records)),
+            dtype=np.float32, count=len(pairs)
+        )
+        
+        return 0.6 * name_similarity + 0.25 * same_company + 0.15 * same_username
+    
     def find_duplicates(self, data_dict: Dict[str, Dict], deduper: dedupe.Dedupe) -> List[Tuple]:
-        """Find duplicate pairs using the trained model."""
+        """Find duplicate clusters among the blocked CRM/LinkedIn pairs.
+        
+        Exact email matches are taken as they are. Of the remaining records,
+        blocked pairs with a clear composite score are linked directly with a
+        union-find; only the ambiguous ones go through the trained model.
+        """
         self.logger.info("Finding duplicates...")
         
-        # Set threshold for matching
-        threshold = deduper.threshold(data_dict, recall_weight=1)
-        self.logger.info(f"Using threshold: {threshold}")
+        # Exact email matches need no scoring: every CRM and LinkedIn record under a shared
+        # address forms one cluster, and the rest of the search runs on the other records
+        crm_emails = self.email_index['crm']
+        linkedin_emails = self.email_index['linkedin']
+        clustered_dupes = []
+        for email in sorted(crm_emails.keys() & linkedin_emails.keys()):
+            crm_ids = [record_id for record_id in crm_emails[email] if record_id in data_dict]
+            linkedin_ids = [record_id for record_id in linkedin_emails[email] if record_id in data_dict]
+            if crm_ids and linkedin_ids:
+                cluster = tuple(crm_ids + linkedin_ids)
+                clustered_dupes.append((cluster, (1.0,) * len(cluster)))
+        resolved_ids = {record_id for cluster, _ in clustered_dupes for record_id in cluster}
+        residual_data = {record_id: record for record_id, record in data_dict.items() if record_id not in resolved_ids}
+        self.logger.info(f"Matched {len(clustered_dupes)} clusters by exact email, {len(residual_data)} records left")
+        
+        # Deterministic blocking pre-pass: only records sharing a block with the other source can match
+        candidate_pairs = self.get_candidate_pairs(residual_data, self.build_blocks(residual_data))
+        self.logger.info(f"Blocking kept {len(candidate_pairs)} candidate pairs over {len(residual_data)} records")
+        
+        if not candidate_pairs:
+            return clustered_dupes
+        
+        pairs = sorted(candidate_pairs)
+        scores = self.score_pairs(residual_data, pairs)
+        ambiguous_pairs = {pairs[i] for i in np.flatnonzero((scores >= self.ambiguous_threshold) & (scores < self.link_threshold))}
+        
+        # Link confident pairs, keep the best score per record for the cluster scores
+        linked = DisjointSet()
+        best_scores = {}
+        for i in np.flatnonzero(scores >= self.link_threshold):
+            crm_id, linkedin_id = pairs[i]
+            score = float(scores[i])
+            linked.add(crm_id)
+            linked.add(linkedin_id)
+            linked.merge(crm_id, linkedin_id)
+            best_scores[crm_id] = max(best_scores.get(crm_id, 0.0), score)
+            best_scores[linkedin_id] = max(best_scores.get(linkedin_id, 0.0), score)
+        
+        # Pairs already joined through other links need no second look
+        ambiguous_pairs = {
+            (crm_id, linkedin_id) for crm_id, linkedin_id in ambiguous_pairs
+            if not (crm_id in linked and linkedin_id in linked and linked.connected(crm_id, linkedin_id))
+        }
         
-        # Find duplicates
-        clustered_dupes = deduper.match(data_dict, threshold)
+        linked_clusters = [
+            (tuple(cluster), tuple(best_scores[record_id] for record_id in cluster))
+            for cluster in linked.subsets()
+        ]
+        clustered_dupes.extend(linked_clusters)
+        self.logger.info(f"Linked {len(linked_clusters)} clusters directly, {len(ambiguous_pairs)} ambiguous pairs left for dedupe")
+        
+        if ambiguous_pairs:
+            # Let the model score just the ambiguous pairs, streamed to it one at a time
+            self.logger.info(f"Using threshold: {self.dedupe_threshold}")
+            scores = deduper.score(
+                ((crm_id, data_dict[crm_id]), (linkedin_id, data_dict[linkedin_id]))
+                for crm_id, linkedin_id in sorted(ambiguous_pairs)
+            )
+            clustered_dupes.extend(deduper.cluster(scores, threshold=self.dedupe_threshold))
         
         self.logger.info(f"Found {len(clustered_dupes)} duplicate clusters")
         return clustered_dupes
@@ -349,50 +714,62 @@ class DuplicateFinder:
         self.logger.info("Analyzing duplicate results...")
         
         results = []
+        matched_records = []
         cross_platform_matches = 0
         
         for cluster, scores in clustered_dupes:
-            cluster_records = [data_dict[record_id] for record_id in cluster]
-            
             # Check if this cluster contains both CRM and LinkedIn records
-            sources = {record['source'] for record in cluster_records}
+            sources = {self.source_of(record_id) for record_id in cluster}
             
             if 'crm' in sources and 'linkedin' in sources:
                 cross_platform_matches += 1
                 
                 # Find the CRM and LinkedIn records
-                crm_records = [r for r in cluster_records if r['source'] == 'crm']
-                linkedin_records = [r for r in cluster_records if r['source'] == 'linkedin']
+                crm_ids = [record_id for record_id in cluster if self.source_of(record_id) == 'crm']
+                linkedin_ids = [record_id for record_id in cluster if self.source_of(record_id) == 'linkedin']
                 
-                for crm_record in crm_records:
-                    for linkedin_record in linkedin_records:
-                        # Calculate confidence score
-                        confidence = max(scores) if scores else 0.0
-                        
-                        match_result = {
-                            'confidence_score': confidence,
-                            'crm_contact': {
-                                'id': crm_record['record_id'],
-                                'full_name': crm_record.get('full_name', ''),
-                                'email': crm_record.get('email', ''),
-                                'company': crm_record.get('company', ''),
-                                'job_title': crm_record.get('job_title', ''),
-                                'phone': crm_record.get('phone', ''),
-                                'source_data': crm_record['original_data']
-                            },
-                            'linkedin_profile': {
-                                'id': linkedin_record['record_id'],
-                                'full_name': linkedin_record.get('full_name', ''),
-                                'email': linkedin_record.get('email', ''),
-                                'company': linkedin_record.get('company', ''),
-                                'job_title': linkedin_record.get('job_title', ''),
-                                'profile_url': linkedin_record['original_data'].get('profile_url', ''),
-                                'source_data': linkedin_record['original_data']
-                            },
-                            'match_reasons': self.analyze_match_reasons(crm_record, linkedin_record)
-                        }
-                        
-                        results.append(match_result)
+                # Calculate confidence score, the same for every pair of the cluster
+                confidence = float(np.max(scores)) if len(scores) else 0.0
+                
+                for crm_id, linkedin_id in product(crm_ids, linkedin_ids):
+                    crm_record = data_dict[crm_id]
+                    crm_data = self.sidecar[crm_id][1]
+                    linkedin_record = data_dict[linkedin_id]
+                    linkedin_data = self.sidecar[linkedin_id][1]
+                    
+                    match_result = {
+                        'confidence_score': confidence,
+                        'crm_contact': {
+                            'id': crm_id,
+                            'full_name': crm_record.get('full_name', ''),
+                            'email': crm_record.get('email', ''),
+                            'company': crm_record.get('company', ''),
+                            'job_title': crm_record.get('job_title', ''),
+                            'phone': crm_record.get('phone', ''),
+                            'source_data': crm_data
+                        },
+                        'linkedin_profile': {
+                            'id': linkedin_id,
+                            'full_name': linkedin_record.get('full_name', ''),
+                            'email': linkedin_record.get('email', ''),
+                            'company': linkedin_record.get('company', ''),
+                            'job_title': linkedin_record.get('job_title', ''),
+                            'profile_url': linkedin_data.get('profile_url', ''),
+                            'source_data': linkedin_data
+                        },
+                        'match_reasons': []
+                    }
+                    
+                    results.append(match_result)
+                    matched_records.append((crm_record, linkedin_record))
+        
+        # Name similarities of all matches in one batch, then the match reasons
+        similarities = name_similarities(
+            [(crm_record.get('full_name') or '') for crm_record, _ in matched_records],
+            [(linkedin_record.get('full_name') or '') for _, linkedin_record in matched_records]
+        )
+        for match_result, (crm_record, linkedin_record), similarity in zip(results, matched_records, similarities):
+            match_result['match_reasons'] = self.analyze_match_reasons(crm_record, linkedin_record, similarity)
         
         self.logger.info(f"Found {cross_platform_matches} cross-platform matches")
         self.logger.info(f"Total match pairs: {len(results)}")
@@ -402,36 +779,44 @@ class DuplicateFinder:
         
         return results
     
-    def analyze_match_reasons(self, crm_record: Dict, linkedin_record: Dict) -> List[str]:
-        """Analyze why two records were matched."""
+    def analyze_match_reasons(self, crm_record: Dict, linkedin_record: Dict, name_similarity: float = None) -> List[str]:
+        """Analyze why two records were matched.
+        
+        ``name_similarity`` is the precomputed ``name_similarities`` value of
+        the two full names; it is computed here when not given.
+        """
         reasons = []
         
-        # Check name similarity
-        crm_name = crm_record.get('full_name', '').lower()
-        linkedin_name = linkedin_record.get('full_name', '').lower()
+        # The fields are already lowercased by normalize_text
+        crm_name = crm_record.get('full_name') or ''
+        linkedin_name = linkedin_record.get('full_name') or ''
+        crm_email = crm_record.get('email') or ''
+        linkedin_email = linkedin_record.get('email') or ''
+        crm_company = crm_record.get('company') or ''
+        linkedin_company = linkedin_record.get('company') or ''
+        crm_title = crm_record.get('job_title') or ''
+        linkedin_title = linkedin_record.get('job_title') or ''
         
+        # Check name similarity
         if crm_name and linkedin_name:
+            if name_similarity is None:
+                name_similarity = name_similarities([crm_name], [linkedin_name])[0]
+            
             if crm_name == linkedin_name:
                 reasons.append("Exact name match")
-            elif crm_name in linkedin_name or linkedin_name in crm_name:
+            elif name_similarity >= 0.8:
                 reasons.append("Partial name match")
-            elif any(word in linkedin_name for word in crm_name.split() if len(word) > 2):
+            elif not name_tokens(crm_name).isdisjoint(name_tokens(linkedin_name)):
                 reasons.append("Name words match")
         
         # Check email similarity
-        crm_email = crm_record.get('email', '').lower()
-        linkedin_email = linkedin_record.get('email', '').lower()
-        
         if crm_email and linkedin_email:
             if crm_email == linkedin_email:
                 reasons.append("Exact email match")
-            elif crm_email.split('@')[0] == linkedin_email.split('@')[0]:
+            elif email_local_part(crm_email) == email_local_part(linkedin_email):
                 reasons.append("Email username match")
         
         # Check company similarity
-        crm_company = crm_record.get('company', '').lower()
-        linkedin_company = linkedin_record.get('company', '').lower()
-        
         if crm_company and linkedin_company:
             if crm_company == linkedin_company:
                 reasons.append("Exact company match")
@@ -439,9 +824,6 @@ class DuplicateFinder:
                 reasons.append("Partial company match")
         
         # Check job title similarity
-        crm_title = crm_record.get('job_title', '').lower()
-        linkedin_title = linkedin_record.get('job_title', '').lower()
-        
         if crm_title and linkedin_title:
             if crm_title == linkedin_title:
                 reasons.append("Exact job title match")
@@ -469,8 +851,12 @@ class DuplicateFinder:
             'matches': results
         }
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            # orjson writes UTF-8 directly, like ensure_ascii=False
+            output_file.write_bytes(orjson.dumps(output_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(output_data, f, indent=2, ensure_ascii=False)
         
         file_size = output_file.stat().st_size / 1024 / 1024
         self.logger.info(f"Results saved to {output_file} ({file_size:.1f} MB)")
@@ -563,20 +949,18 @@ async def main():
         return False
     
     try:
-        # Load data
-        crm_contacts, linkedin_profiles = finder.load_data()
+        # Stream both files straight into the prepared records
+        data_dict = finder.prepare_data_for_dedupe(finder.iter_crm_contacts(), finder.iter_linkedin_profiles())
+        sources = {source for source, _ in finder.sidecar.values()}
         
-        if not crm_contacts:
+        if 'crm' not in sources:
             print("❌ No CRM contacts found")
             return False
         
-        if not linkedin_profiles:
+        if 'linkedin' not in sources:
             print("❌ No LinkedIn profiles found")
             return False
         
-        # Prepare data for dedupe
-        data_dict = finder.prepare_data_for_dedupe(crm_contacts, linkedin_profiles)
-        
         # Train or load dedupe model
         deduper = finder.train_dedupe_model(data_dict)
         
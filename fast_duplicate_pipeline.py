@@ -10,7 +10,6 @@ This simplified version uses:
 Designed to run quickly while maintaining good accuracy.
 """
 
-import json
 import logging
 import time
 from pathlib import Path
@@ -22,7 +21,7 @@ from unidecode import unidecode
 import asyncio
 
 # Import the blocking engine from our main pipeline
-from duplicate_detection_pipeline import BlockingEngine, CandidatePair
+from duplicate_detection_pipeline import BlockingEngine, CandidateBatch, load_json_items, save_json
 from sync.ai_duplicate_detection import AIDuplicateDetector, MatchConfidence
 
 
@@ -220,6 +219,8 @@ class FastDuplicateDetector:
         self.fast_threshold_high = 0.8
         self.fast_threshold_medium = 0.6
         self.max_ai_comparisons = 1000  # Reduced for speed
+        self.ai_concurrency = 16  # AI requests in flight at once
+        self.ai_batch_size = 8  # Pairs compared per AI request
     
     async def detect_duplicates(self, linkedin_contacts: List[Dict], crm_contacts: List[Dict]) -> Dict[str, Any]:
         """Run the fast multi-stage duplicate detection pipeline."""
@@ -297,7 +298,7 @@ class FastDuplicateDetector:
         
         return results
     
-    def _run_scoring_stage(self, candidate_pairs: List[CandidatePair]) -> Dict[str, Any]:
+    def _run_scoring_stage(self, candidate_pairs: CandidateBatch) -> Dict[str, Any]:
         """Run the fast similarity scoring stage."""
         self.logger.info(f"Scoring {len(candidate_pairs)} candidate pairs...")
         
@@ -360,16 +361,35 @@ class FastDuplicateDetector:
         
         self.logger.info(f"AI verifying {len(pairs_to_verify)} medium-confidence pairs")
         
-        for i, scored_pair in enumerate(pairs_to_verify):
-            if i % 50 == 0 and i > 0:
-                self.logger.info(f"AI verification progress: {i}/{len(pairs_to_verify)}")
+        # The comparisons are independent Ollama round trips, so keep several in flight
+        semaphore = asyncio.Semaphore(self.ai_concurrency)
+        completed = 0
+        
+        async def verify(batch: List[ScoredCandidate]):
+            nonlocal completed
+            async with semaphore:
+                try:
+                    return await self.ai_detector.compare_contacts_batch(
+                        [(scored_pair.linkedin_contact, scored_pair.crm_contact) for scored_pair in batch]
+                    )
+                except Exception as e:
+                    self.logger.error(f"Error in AI verification: {str(e)}")
+                    return [None] * len(batch)
+                finally:
+                    completed += len(batch)
+                    if completed % 50 < len(batch):
+                        self.logger.info(f"AI verification progress: {completed}/{len(pairs_to_verify)}")
+        
+        # Several pairs per request, several requests in flight
+        batches = [pairs_to_verify[i:i + self.ai_batch_size] for i in range(0, len(pairs_to_verify), self.ai_batch_size)]
+        ai_outcomes = [ai_result for batch_results in await asyncio.gather(*(verify(batch) for batch in batches))
+                       for ai_result in batch_results]
+        
+        for scored_pair, ai_result in zip(pairs_to_verify, ai_outcomes):
+            if ai_result is None:
+                continue
             
             try:
-                ai_result = await self.ai_detector.compare_contacts(
-                    scored_pair.linkedin_contact, 
-                    scored_pair.crm_contact
-                )
-                
                 ai_match_data = {
                     "original_scored_match": {
                         "similarity_score": scored_pair.similarity_score,
@@ -533,8 +553,7 @@ class FastDuplicateDetector:
             else:
                 clean_results[key] = value
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(clean_results, f, indent=2, ensure_ascii=False)
+        save_json(output_path, clean_results)
         
         file_size = output_path.stat().st_size / 1024 / 1024
         self.logger.info(f"Results saved to {output_path} ({file_size:.1f} MB)")
@@ -573,14 +592,10 @@ async def main():
     
     try:
         # Load LinkedIn contacts
-        with open(linkedin_file, 'r', encoding='utf-8') as f:
-            linkedin_data = json.load(f)
-        linkedin_contacts = linkedin_data.get('profiles', [])
+        linkedin_contacts = load_json_items(linkedin_file, 'profiles')
         
         # Load CRM contacts
-        with open(crm_file, 'r', encoding='utf-8') as f:
-            crm_data = json.load(f)
-        crm_contacts = crm_data.get('contacts', [])
+        crm_contacts = load_json_items(crm_file, 'contacts')
         
         if not linkedin_contacts:
             print("❌ No LinkedIn contacts found")
@@ -89,6 +89,15 @@ class AIDuplicateDetector:
             result_type=ComparisonResult,
             system_prompt=self._get_system_prompt()
         )
+        
+        # Agent answering several comparisons with one prompt (see compare_contacts_batch)
+        self.batch_agent = Agent(
+            model=ollama_model_instance,
+            result_type=List[ComparisonResult],
+            system_prompt=self._get_system_prompt() + """
+When given several numbered pairs, return a list with one result per pair, in the same order.
+"""
+        )
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the AI agent."""
@@ -145,6 +154,41 @@ Focus on name similarity, company/job alignment, and contact information.
                 conflicting_fields=[]
             )
     
+    async def compare_contacts_batch(self, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[ComparisonResult]:
+        """
+        Compare several LinkedIn/CRM contact pairs with a single AI request.
+        
+        The system prompt and request overhead are paid once for the whole
+        batch. If the batch request fails or returns the wrong number of
+        results, the pairs are compared one by one instead, sequentially so
+        the fallback never exceeds the caller's concurrency limit.
+        
+        Args:
+            pairs: (linkedin_contact, crm_contact) tuples
+            
+        Returns:
+            One ComparisonResult per pair, in input order
+        """
+        if len(pairs) == 1:
+            return [await self.compare_contacts(*pairs[0])]
+        
+        try:
+            prompt = "\n".join(
+                f"Pair {i}:{self._build_comparison_prompt(linkedin_contact, crm_contact)}"
+                for i, (linkedin_contact, crm_contact) in enumerate(pairs, 1)
+            )
+            result = await self.batch_agent.run(prompt)
+            
+            if len(result.output) == len(pairs):
+                return result.output
+            self.logger.warning(f"AI batch returned {len(result.output)} results for {len(pairs)} pairs, comparing individually")
+            
+        except Exception as e:
+            self.logger.error(f"Error in AI batch duplicate detection: {str(e)}")
+        
+        # One request at a time: the caller holds a single concurrency slot for the whole batch
+        return [await self.compare_contacts(*pair) for pair in pairs]
+    
     def _build_comparison_prompt(self, linkedin_contact: Dict[str, Any], 
                                crm_contact: Dict[str, Any]) -> str:
         """Build a detailed comparison prompt for the AI agent."""
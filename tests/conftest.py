@@ -21,6 +21,16 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture
+def raw_values():
+    """Accents, titles, company suffixes, odd whitespace, non-Latin scripts and non-string values."""
+    return [
+        "  Dr. Anna  Müller GmbH ", "Prof. Jürgen\tSchmidt", "ACME Inc.", "Café Ltd", "Björn AG",
+        "Łukasz Żółć", "\xa0Zoë\u2009Ng ", "東京", "a\vb", "x\x1cy", "Mr. ", "dr.dre", "mrs smith ltd", "GmbH",
+        "", "   ", None, 42
+    ]
+
+
 @pytest.fixture(autouse=True)
 def setup_test_environment():
     """Set up test environment before each test."""
@@ -0,0 +1,290 @@
+"""
+Tests for the offline parts of crm_contact_downloader.py.
+
+The downloader runs inside a temporary working directory, so its data/
+files never touch the real export; no CRM credentials or network are needed.
+"""
+
+import json
+import os
+import stat
+from pathlib import Path
+
+import httpx
+import pytest
+
+import crm_contact_downloader
+from crm_contact_downloader import DynamicsCRMDownloader, _columnar_contact_stats, _contact_stats, write_contacts_json
+
+
+KEY_FIELDS = ["fullname", "emailaddress1", "telephone1", "jobtitle", "companyname"]
+
+
+def sample_contacts():
+    """Contacts with blank, missing and non-string values and ties in the top lists."""
+    return [
+        {"contactid": "1", "fullname": "Anna", "emailaddress1": "anna@example.com", "address1_country": "Germany",
+         "address1_city": "Berlin", "companyname": "Acme", "jobtitle": "CTO", "createdon": "2021-03-01T09:00:00Z",
+         "statecode": 0, "telephone1": None},
+        {"contactid": "2", "fullname": "  ", "emailaddress1": "", "address1_country": "Austria",
+         "address1_city": "Wien", "companyname": "Initech", "jobtitle": "CEO", "createdon": "2022-01-01T09:00:00Z",
+         "statecode": 1, "telephone1": None},
+        {"contactid": "3", "fullname": "Ben", "address1_country": "Germany", "address1_city": "Berlin",
+         "companyname": "Acme", "createdon": "n/a", "statecode": 0, "telephone1": None},
+        {"contactid": "4", "fullname": "Clara", "address1_country": "Austria", "companyname": "Initech",
+         "jobtitle": "CTO", "createdon": None, "telephone1": None}
+    ]
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    """A downloader whose data/ directory and token cache live under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(crm_contact_downloader, "TOKEN_CACHE_PATH", tmp_path / "cache" / "crm_token.json")
+    return DynamicsCRMDownloader()
+
+
+class TestContactSelect:
+    """The $select projection includes everything the AI comparison reads."""
+    
+    def test_default_includes_ai_prompt_fields(self, downloader, monkeypatch):
+        monkeypatch.delenv("DYNAMICS_CONTACT_SELECT", raising=False)
+        
+        columns = DynamicsCRMDownloader().contact_select.split(",")
+        
+        assert {"description", "mc_linkedin", "mc_linkedinprofile"} <= set(columns)
+    
+    def test_environment_overrides_the_projection(self, downloader, monkeypatch):
+        monkeypatch.setenv("DYNAMICS_CONTACT_SELECT", "contactid,fullname")
+        
+        assert DynamicsCRMDownloader().contact_select == "contactid,fullname"
+
+
+class TestTokenCache:
+    """The OAuth token is cached outside the project tree, readable only by the owner."""
+    
+    def test_saved_token_is_reused(self, downloader, tmp_path):
+        downloader.access_token = "secret"
+        downloader.token_expires_at = 4102444800  # 2100-01-01
+        
+        downloader._save_cached_token()
+        
+        reloaded = DynamicsCRMDownloader()
+        assert reloaded._load_cached_token()
+        assert reloaded.access_token == "secret"
+        assert stat.S_IMODE(os.stat(tmp_path / "cache" / "crm_token.json").st_mode) == 0o600
+        assert not list((tmp_path / "data").glob("*token*"))
+    
+    def test_default_path_is_in_the_user_cache(self):
+        assert crm_contact_downloader.TOKEN_CACHE_PATH.is_relative_to(Path.home() / ".cache")
+
+
+class TestAddContact:
+    """Full downloads keep one contact per contactid."""
+    
+    def test_repeated_contactid_counts_as_duplicate(self, downloader):
+        assert downloader._add_contact({"contactid": "a", "fullname": "Anna"})
+        assert not downloader._add_contact({"contactid": "a", "fullname": "Anna B."})
+        
+        assert downloader._contacts["a"]["fullname"] == "Anna"
+        assert downloader._duplicates_skipped == 1
+        assert downloader._invalid_skipped == 0
+    
+    def test_missing_contactid_counts_as_invalid(self, downloader):
+        assert not downloader._add_contact({"fullname": "Anna"})
+        
+        assert downloader._contacts == {}
+        assert downloader._duplicates_skipped == 0
+        assert downloader._invalid_skipped == 1
+
+
+class TestApplyChange:
+    """Delta rows are merged into the previously exported contacts."""
+    
+    @pytest.fixture
+    def exported(self, downloader):
+        downloader._contacts = {
+            "a": {"contactid": "a", "fullname": "Anna"},
+            "b": {"contactid": "b", "fullname": "Ben"}
+        }
+        return downloader
+    
+    def test_modified_contact_replaces_previous_row(self, exported):
+        assert exported._apply_change({"contactid": "a", "fullname": "Anna Schmidt"})
+        
+        assert exported._contacts["a"] == {"contactid": "a", "fullname": "Anna Schmidt"}
+        assert len(exported._contacts) == 2
+    
+    def test_new_contact_is_added(self, exported):
+        assert exported._apply_change({"contactid": "c", "fullname": "Clara"})
+        
+        assert set(exported._contacts) == {"a", "b", "c"}
+    
+    def test_deleted_contact_is_removed(self, exported):
+        assert not exported._apply_change({"id": "b", "reason": "deleted"})
+        
+        assert set(exported._contacts) == {"a"}
+        assert exported._contacts_removed == 1
+    
+    def test_deleting_unknown_contact_is_harmless(self, exported):
+        assert not exported._apply_change({"id": "zzz", "reason": "deleted"})
+        
+        assert set(exported._contacts) == {"a", "b"}
+    
+    def test_row_without_contactid_is_invalid(self, exported):
+        assert not exported._apply_change({"fullname": "Nobody"})
+        
+        assert set(exported._contacts) == {"a", "b"}
+        assert exported._invalid_skipped == 1
+
+
+class TestDeltaLink:
+    """Only a download that read every page leaves a delta link behind."""
+    
+    @pytest.fixture
+    def paged(self, downloader, monkeypatch):
+        """Serve one page from the first request; ``fail_next_page`` makes the second one fail."""
+        state = {"fail_next_page": False}
+        
+        async def get_total_contact_count():
+            return 2
+        
+        async def get_contacts_batch(page_info, page_size=1000):
+            page_info["next_link"] = "https://crm.example.com/next"
+            yield {"contactid": "a"}
+        
+        async def get_contacts_from_url(url, page_info, page_size=1000):
+            if state["fail_next_page"]:
+                raise httpx.ConnectError("connection reset")
+            page_info["delta_link"] = "https://crm.example.com/delta"
+            yield {"contactid": "b"}
+        
+        monkeypatch.setattr(downloader, "get_total_contact_count", get_total_contact_count)
+        monkeypatch.setattr(downloader, "get_contacts_batch", get_contacts_batch)
+        monkeypatch.setattr(downloader, "get_contacts_from_url", get_contacts_from_url)
+        downloader.refresh = True
+        return downloader, state
+    
+    @pytest.mark.asyncio
+    async def test_complete_download_keeps_delta_link(self, paged):
+        downloader, _ = paged
+        
+        contacts = await downloader.download_all_contacts()
+        
+        assert [contact["contactid"] for contact in contacts] == ["a", "b"]
+        assert downloader._delta_link == "https://crm.example.com/delta"
+    
+    @pytest.mark.asyncio
+    async def test_partial_full_download_removes_stale_delta_link(self, paged):
+        downloader, state = paged
+        downloader._delta_link_path.write_text("https://crm.example.com/stale", encoding="utf-8")
+        state["fail_next_page"] = True
+        
+        contacts = await downloader.download_all_contacts()
+        
+        assert [contact["contactid"] for contact in contacts] == ["a"]
+        assert downloader._delta_link is None
+        assert not downloader._delta_link_path.exists()
+
+
+class TestPageCache:
+    """Finished pages are cached on disk and cleared together with partial writes."""
+    
+    @pytest.fixture
+    def served(self, downloader):
+        """Serve one fixed page body and count the requests that reach the network."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, content=b'{"value": []}')
+        
+        downloader._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return downloader, requests
+    
+    @pytest.mark.asyncio
+    async def test_complete_page_is_served_from_cache(self, served):
+        downloader, requests = served
+        url = "https://crm.example.com/api/data/v9.2/contacts"
+        
+        first = b"".join([chunk async for chunk in downloader._iter_page_bytes(url, {})])
+        second = b"".join([chunk async for chunk in downloader._iter_page_bytes(url, {})])
+        
+        assert first == second == b'{"value": []}'
+        assert len(requests) == 1
+        assert not list(crm_contact_downloader.PAGE_CACHE_DIR.glob("*.part"))
+        await downloader._client.aclose()
+    
+    def test_clear_removes_orphaned_partial_pages(self, downloader):
+        cache_dir = crm_contact_downloader.PAGE_CACHE_DIR
+        cache_dir.mkdir(parents=True)
+        (cache_dir / "finished.json").write_bytes(b"{}")
+        (cache_dir / "crashed.part").write_bytes(b'{"val')
+        
+        downloader._clear_page_cache()
+        
+        assert list(cache_dir.iterdir()) == []
+
+
+class TestContactStats:
+    """The pyarrow statistics match the row-by-row ones."""
+    
+    def test_columnar_matches_row_by_row(self):
+        pytest.importorskip("pyarrow")
+        contacts = sample_contacts()
+        
+        assert _columnar_contact_stats(contacts, KEY_FIELDS) == _contact_stats(contacts, KEY_FIELDS)
+    
+    def test_row_by_row_counts(self):
+        stats = _contact_stats(sample_contacts(), KEY_FIELDS)
+        
+        assert stats["key_field_counts"] == {"fullname": 4, "emailaddress1": 1, "telephone1": 0, "jobtitle": 3, "companyname": 4}
+        assert stats["field_counts"]["fullname"] == 3  # a blank name is not filled in
+        assert stats["field_counts"]["statecode"] == 3
+        assert stats["top_countries"] == [("Germany", 2), ("Austria", 2)]
+        assert stats["creation_timeline"] == [("2021", 1), ("2022", 1)]
+
+
+class TestWriteContactsJson:
+    """The streamed export is one JSON document with one contact per line."""
+    
+    @pytest.fixture(params=["orjson", "json"])
+    def serializer(self, request, monkeypatch):
+        """Run each test with orjson (if installed) and with the stdlib json module."""
+        if request.param == "orjson":
+            pytest.importorskip("orjson")
+        else:
+            monkeypatch.setattr(crm_contact_downloader, "orjson", None)
+        return request.param
+    
+    def test_round_trip(self, tmp_path, serializer):
+        output_data = {
+            "download_info": {"total_contacts": 2, "source": "Microsoft Dynamics CRM"},
+            "analysis": {"top_countries": [["Österreich", 1]]},
+            "contacts": sample_contacts()[:2]
+        }
+        path = tmp_path / "contacts.json"
+        
+        write_contacts_json(path, output_data)
+        
+        assert json.loads(path.read_text(encoding="utf-8")) == output_data
+        assert "Österreich" in path.read_text(encoding="utf-8")
+    
+    def test_one_compact_line_per_contact(self, tmp_path, serializer):
+        contacts = sample_contacts()
+        path = tmp_path / "contacts.json"
+        
+        write_contacts_json(path, {"download_info": {}, "contacts": contacts})
+        
+        lines = path.read_text(encoding="utf-8").splitlines()
+        start = lines.index('"contacts": [') + 1
+        contact_lines = lines[start:start + len(contacts)]
+        assert [json.loads(line.rstrip(",")) for line in contact_lines] == contacts
+        assert lines[start + len(contacts):] == ["]", "}"]
+    
+    def test_no_contacts(self, tmp_path, serializer):
+        path = tmp_path / "contacts.json"
+        
+        write_contacts_json(path, {"download_info": {"total_contacts": 0}, "contacts": []})
+        
+        assert json.loads(path.read_text(encoding="utf-8")) == {"download_info": {"total_contacts": 0}, "contacts": []}
@@ -0,0 +1,189 @@
+"""
+Tests for the blocking and ranking stages of duplicate_detection_pipeline.py.
+
+Blocks are built by hand as {key: {'linkedin': [...], 'crm': [...]}} dicts,
+so no contact files or AI backend are needed.
+"""
+
+import pytest
+
+import duplicate_detection_pipeline
+from duplicate_detection_pipeline import BlockingEngine, MultiStageDuplicateDetector
+
+
+def lsh_blocks(count, linkedin_ids=(0,), crm_ids=(0,)):
+    """``count`` LSH band blocks shared by the same records."""
+    return {f"lsh_{band}_{band:04x}": {'linkedin': list(linkedin_ids), 'crm': list(crm_ids)} for band in range(count)}
+
+
+@pytest.fixture
+def detector():
+    """A detector whose AI stage is never reached in these tests."""
+    return MultiStageDuplicateDetector()
+
+
+@pytest.fixture
+def engine():
+    """A blocking engine with the default pruning settings."""
+    return BlockingEngine()
+
+
+def acme_linkedin(names):
+    """LinkedIn profiles of people who all work at Acme Corp (acme.com)."""
+    return [{"full_name": name, "email": f"{name.lower().replace(' ', '.')}@acme.com",
+             "current_position": "Engineer at Acme Corp"} for name in names]
+
+
+def acme_crm(names):
+    """CRM contacts of people who all work at Acme Corp (acme.com)."""
+    return [{"fullname": name, "firstname": name.split()[0], "lastname": name.split()[1],
+             "emailaddress1": f"{name.lower().replace(' ', '')}@acme.com", "companyname": "Acme Corp"} for name in names]
+
+
+class TestPruneBlocks:
+    """Common domain, company and LSH blocks are dropped, exact keys always kept."""
+    
+    def test_exact_keys_survive_many_lsh_keys(self, engine):
+        blocks = lsh_blocks(16)
+        # Larger than every LSH block, so it would sort last on size alone
+        blocks["name_annaschmidt"] = {'linkedin': [0, 1, 2], 'crm': [0, 1, 2]}
+        blocks["email_anna@example.com"] = {'linkedin': [0], 'crm': [0, 1, 2]}
+        
+        pruned = engine.prune_blocks(blocks.items())
+        
+        assert pruned["name_annaschmidt"] == {'linkedin': [0, 1, 2], 'crm': [0, 1, 2]}
+        assert pruned["email_anna@example.com"] == {'linkedin': [0], 'crm': [0, 1, 2]}
+    
+    def test_company_key_is_not_crowded_out_by_lsh_keys(self, engine):
+        blocks = lsh_blocks(16)
+        blocks["company_acme"] = {'linkedin': [0, 1], 'crm': [0, 1]}
+        
+        pruned = engine.prune_blocks(blocks.items())
+        
+        assert pruned["company_acme"] == {'linkedin': [0, 1], 'crm': [0, 1]}
+    
+    def test_rarest_lsh_bands_are_kept(self, engine):
+        blocks = {
+            f"lsh_{band}_{band:04x}": {'linkedin': [0], 'crm': list(range(band + 1))}
+            for band in range(10)
+        }
+        
+        pruned = engine.prune_blocks(blocks.items())
+        
+        # ceil(0.3 * 10) = 3 bands per record: the three smallest blocks for linkedin 0
+        kept = [key for key, block in pruned.items() if 0 in block['linkedin']]
+        assert kept == ["lsh_0_0000", "lsh_1_0001", "lsh_2_0002"]
+    
+    def test_one_sided_blocks_are_dropped(self, engine):
+        blocks = {
+            "name_annaschmidt": {'linkedin': [0], 'crm': []},
+            "email_anna@example.com": {'linkedin': [0], 'crm': [0]}
+        }
+        
+        pruned = engine.prune_blocks(blocks.items())
+        
+        assert list(pruned) == ["email_anna@example.com"]
+    
+    def test_full_fraction_keeps_every_band(self, engine):
+        engine.prefix_fraction = 1.0
+        blocks = lsh_blocks(16)
+        
+        assert engine.prune_blocks(blocks.items()) == blocks
+    
+    def test_oversized_blocks_are_dropped_except_exact_keys(self, engine):
+        crowd = {'linkedin': list(range(30)), 'crm': list(range(30))}
+        blocks = {"domain_acme.com": crowd, "company_acmecorp": crowd, "name_thomasmuller": crowd}
+        
+        pruned = engine.prune_blocks(blocks.items())
+        
+        assert list(pruned) == ["name_thomasmuller"]
+    
+    def test_shared_domain_and_company_do_not_pair_everyone(self, engine):
+        linkedin = acme_linkedin([f"Anna{i} Meier{i}" for i in range(50)])
+        crm = acme_crm([f"Zoltan{i} Quast{i}" for i in range(50)])
+        
+        candidate_pairs = engine.generate_candidate_pairs(linkedin, crm)
+        
+        reasons = {candidate_pairs.reason_vocab[code] for code in candidate_pairs.reason_code.tolist()}
+        assert len(candidate_pairs) < 50
+        assert not reasons & {"domain_acme.com", "company_acmecorp"}
+    
+    def test_real_duplicate_among_colleagues_still_pairs(self, engine):
+        linkedin = acme_linkedin([f"Anna{i} Meier{i}" for i in range(50)])
+        crm = acme_crm([f"Zoltan{i} Quast{i}" for i in range(49)] + ["Anna7 Meier7"])
+        
+        candidate_pairs = engine.generate_candidate_pairs(linkedin, crm)
+        
+        assert (7, 49) in set(zip(candidate_pairs.linkedin_idx.tolist(), candidate_pairs.crm_idx.tolist()))
+    
+    def test_small_company_still_blocks(self, engine):
+        linkedin = acme_linkedin(["Anna Meier", "Bernd Roth"])
+        crm = acme_crm(["Zoltan Quast", "Clara Vogt"])
+        
+        assert len(engine.generate_candidate_pairs(linkedin, crm)) == 4
+
+
+class TestRankingScorer:
+    """Stage 2 reports the scorer that actually ranked the pairs."""
+    
+    def test_rapidfuzz_scores_directly_when_installed(self, detector, monkeypatch):
+        monkeypatch.setattr(duplicate_detection_pipeline, "process", object())
+        
+        assert detector._ranking_scorer(detector.dedupe_fast_threshold * 10) == "rapidfuzz"
+    
+    def test_without_rapidfuzz_only_large_sets_train_dedupe(self, detector, monkeypatch):
+        monkeypatch.setattr(duplicate_detection_pipeline, "process", None)
+        
+        assert detector._ranking_scorer(detector.dedupe_fast_threshold - 1) == "difflib"
+        assert detector._ranking_scorer(detector.dedupe_fast_threshold) == "dedupe"
+    
+    def test_colleagues_are_not_reported_as_matches(self, detector):
+        # Keep the shared domain/company blocks, so every pair gets scored
+        detector.blocking_engine.max_block_records = 1000
+        candidate_pairs = detector.blocking_engine.generate_candidate_pairs(
+            acme_linkedin(["Anna Meier", "Bernd Roth", "Clara Vogt"]),
+            acme_crm(["Zoltan Quast", "Dieter Sauer", "Anna Meier"])
+        )
+        
+        matches = detector._score_pairs_directly(candidate_pairs)
+        
+        assert len(candidate_pairs) == 9
+        assert [(match['linkedin_profile']['full_name'], match['crm_contact']['full_name']) for match in matches] == [
+            ("Anna Meier", "Anna Meier")
+        ]
+    
+    def test_matching_email_is_reported_despite_a_different_name(self, detector):
+        candidate_pairs = detector.blocking_engine.generate_candidate_pairs(
+            [{"full_name": "Hans Schmidt", "email": "info@schmidt-consulting.de", "current_position": ""}],
+            [{"fullname": "Petra Schmidt", "firstname": "Petra", "lastname": "Schmidt",
+              "emailaddress1": "info@schmidt-consulting.de"}]
+        )
+        
+        matches = detector._score_pairs_directly(candidate_pairs)
+        
+        assert len(matches) == 1
+        assert matches[0]['confidence_score'] >= detector.dedupe_threshold_medium
+    
+    @pytest.mark.asyncio
+    async def test_stage_stats_name_the_scorer(self, detector):
+        candidate_pairs = detector.blocking_engine.generate_candidate_pairs(
+            [{"full_name": "Anna Schmidt", "email": "anna@example.com", "current_position": "CTO at Acme"}],
+            [{"fullname": "Anna Schmidt", "firstname": "Anna", "lastname": "Schmidt",
+              "emailaddress1": "anna@example.com", "companyname": "Acme"}]
+        )
+        
+        stats = await detector._run_dedupe_stage(candidate_pairs)
+        
+        assert stats["scorer"] == detector._ranking_scorer(len(candidate_pairs))
+        assert stats["total_matches"] == 1
+
+
+class TestNormalizeMany:
+    """The columnar normalization matches ``normalize_for_blocking`` value by value."""
+    
+    @pytest.mark.parametrize("with_pyarrow", [True, False])
+    def test_matches_scalar_normalization(self, engine, raw_values, with_pyarrow, monkeypatch):
+        if not with_pyarrow:
+            monkeypatch.setattr(duplicate_detection_pipeline, "pa", None)
+        
+        assert engine.normalize_many(raw_values) == [engine.normalize_for_blocking(value) for value in raw_values]
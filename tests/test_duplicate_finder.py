@@ -0,0 +1,199 @@
+"""
+Tests for the blocking and matching helpers of duplicate_finder.py.
+
+These run offline on small in-memory contact lists; no data files or trained
+dedupe model are needed.
+"""
+
+import pytest
+
+import duplicate_finder
+from duplicate_finder import DuplicateFinder, key_field_mask, normalize_column, soundex
+
+
+def make_crm_contact(fullname, email=None, company=None, jobtitle=None):
+    """A minimal Dynamics CRM contact."""
+    first_name, _, last_name = fullname.partition(" ")
+    return {
+        "fullname": fullname,
+        "firstname": first_name,
+        "lastname": last_name,
+        "emailaddress1": email,
+        "companyname": company,
+        "jobtitle": jobtitle
+    }
+
+
+def make_linkedin_profile(full_name, email=None, company=None, headline=None):
+    """A minimal scraped LinkedIn profile."""
+    return {
+        "full_name": full_name,
+        "contact_info": [email] if email else [],
+        "current_position": f"{headline or 'Consultant'} at {company}" if company else "",
+        "headline": headline,
+        "profile_url": f"https://www.linkedin.com/in/{full_name.lower().replace(' ', '-')}"
+    }
+
+
+@pytest.fixture
+def finder():
+    """A finder that never touches the data directory."""
+    return DuplicateFinder()
+
+
+class TestExactEmailMatches:
+    """Exact email matches are clustered before any scoring."""
+    
+    def test_every_record_under_a_shared_email_is_clustered(self, finder):
+        data_dict = finder.prepare_data_for_dedupe(
+            [
+                make_crm_contact("Anna Schmidt", "anna@example.com", "Acme"),
+                make_crm_contact("Anna Schmidt-Berg", "anna@example.com", "Acme")
+            ],
+            [make_linkedin_profile("Anna Schmidt", "anna@example.com", "Acme")]
+        )
+        
+        clusters = finder.find_duplicates(data_dict, deduper=None)
+        
+        assert clusters == [(("crm_0", "crm_1", "linkedin_0"), (1.0, 1.0, 1.0))]
+    
+    def test_all_email_pairs_become_training_matches(self, finder):
+        data_dict = finder.prepare_data_for_dedupe(
+            [
+                make_crm_contact("Anna Schmidt", "anna@example.com", "Acme"),
+                make_crm_contact("Anna Schmidt-Berg", "anna@example.com", "Acme")
+            ],
+            [make_linkedin_profile("Anna Schmidt", "anna@example.com", "Acme")]
+        )
+        
+        matches = [pair for pair in finder.create_automatic_training_pairs(data_dict) if pair["match"]]
+        
+        assert len(matches) == 2
+
+
+class TestCompositeScoring:
+    """Residual pairs are linked on name + company, never on name alone."""
+    
+    def test_same_name_and_company_links(self, finder):
+        data_dict = finder.prepare_data_for_dedupe(
+            [make_crm_contact("Jonas Weber", "jonas@acme.de", "Acme", "CTO")],
+            [make_linkedin_profile("Jonas Weber", "j.weber@gmail.com", "Acme", "CTO")]
+        )
+        
+        clusters = finder.find_duplicates(data_dict, deduper=None)
+        
+        assert [set(cluster) for cluster, _ in clusters] == [{"crm_0", "linkedin_0"}]
+    
+    def test_same_name_alone_is_left_to_dedupe(self, finder):
+        data_dict = finder.prepare_data_for_dedupe(
+            [make_crm_contact("Jonas Weber", "jonas@acme.de", "Acme", "CTO")],
+            [make_linkedin_profile("Jonas Weber", "j.weber@gmail.com", "Initech", "CTO")]
+        )
+        pairs = [("crm_0", "linkedin_0")]
+        
+        score = float(finder.score_pairs(data_dict, pairs)[0])
+        
+        assert finder.ambiguous_threshold <= score < finder.link_threshold
+
+
+class TestSoundex:
+    """American Soundex codes of last names, as used for blocking."""
+    
+    @pytest.mark.parametrize("name, code", [
+        ("Robert", "R163"),
+        ("Rupert", "R163"),
+        ("Rubin", "R150"),
+        ("Ashcraft", "A261"),  # h does not separate the equal codes of s and c
+        ("Tymczak", "T522"),  # the vowel does separate the two 2s
+        ("Pfister", "P236"),  # f shares the first letter's code
+        ("Honeyman", "H555"),
+        ("Lee", "L000")
+    ])
+    def test_reference_codes(self, name, code):
+        assert soundex(name) == code
+    
+    def test_spelling_variants_share_a_code(self):
+        assert soundex("mueller") == soundex("muller") == soundex("müller")
+    
+    def test_name_without_letters_has_no_code(self):
+        assert soundex("") == ""
+        assert soundex("1234") == ""
+
+
+class TestNormalizeColumn:
+    """The columnar normalization matches ``normalize_text`` value by value."""
+    
+    @pytest.mark.parametrize("with_pyarrow", [True, False])
+    def test_matches_scalar_normalization(self, finder, raw_values, with_pyarrow, monkeypatch):
+        if not with_pyarrow:
+            monkeypatch.setattr(duplicate_finder, "pa", None)
+        
+        assert normalize_column(raw_values) == [finder.normalize_text(value) for value in raw_values]
+    
+    def test_columns_are_split_back_in_order(self, finder):
+        names, companies = finder.normalize_columns(["Dr. Anna Müller", ""], ["Acme GmbH", "Initech"])
+        
+        assert names == ["anna muller", None]
+        assert companies == ["acme", "initech"]
+
+
+class TestRecordValidity:
+    """A record needs at least two non-empty key fields."""
+    
+    def test_one_bit_per_key_field(self):
+        assert key_field_mask("anna schmidt", None, None, None, None, None) == 0b000001
+        assert key_field_mask(None, None, None, "anna@example.com", None, "cto") == 0b101000
+        assert key_field_mask("a", "b", "c", "d", "e", "f") == 0b111111
+        assert key_field_mask("", None, "", None, "", None) == 0
+    
+    @pytest.mark.parametrize("mask, valid", [
+        (0, False),
+        (0b000001, False),
+        (0b100000, False),
+        (0b001001, True),
+        (0b111111, True)
+    ])
+    def test_two_fields_make_a_valid_record(self, finder, mask, valid):
+        assert finder.is_record_valid({'field_mask': mask}) is valid
+    
+    def test_records_with_a_single_field_are_skipped(self, finder):
+        data_dict = finder.prepare_data_for_dedupe(
+            [{"emailaddress1": "anna@example.com"}, make_crm_contact("Anna Schmidt")],
+            [{"headline": "CTO"}]
+        )
+        
+        assert list(data_dict) == ["crm_1"]
+        assert "field_mask" not in data_dict["crm_1"]
+
+
+class TestOversizedBlocks:
+    """Blocks over ``max_block_size`` are split on soundex + first initial + company."""
+    
+    @pytest.fixture
+    def data_dict(self, finder):
+        """Three Schmidts in the CRM and two on LinkedIn, none with an email."""
+        return finder.prepare_data_for_dedupe(
+            [
+                make_crm_contact("Anna Schmidt", company="Acme"),
+                make_crm_contact("Bernd Schmidt", company="Initech"),
+                make_crm_contact("Carla Schmidt", company="Acme")
+            ],
+            [
+                make_linkedin_profile("Anna Schmidt", company="Acme"),
+                make_linkedin_profile("Bernd Schmitt", company="Initech")
+            ]
+        )
+    
+    def test_oversized_block_is_split_not_dropped(self, finder, data_dict):
+        # Only the five-record soundex block is oversized
+        finder.max_block_size = 3
+        
+        pairs = finder.get_candidate_pairs(data_dict, finder.build_blocks(data_dict))
+        
+        # Bernd's spelling variants only meet in the finer (S530, b, ini) block
+        assert pairs == {("crm_0", "linkedin_0"), ("crm_1", "linkedin_1")}
+    
+    def test_finer_blocks_still_too_large_add_no_pairs(self, finder, data_dict):
+        finder.max_block_size = 1
+        
+        assert finder.get_candidate_pairs(data_dict, finder.build_blocks(data_dict)) == set()